@@ -1,10 +1,6 @@
 package main
 
 import (
-	"encoding/csv"
-	"io"
-	"log"
-	"os"
 	"strconv"
 )
 
@@ -14,100 +10,184 @@ type boosterT struct {
 	shieldStrengthBonus, expResBonus, kinResBonus, thermResBonus float64
 }
 
+func parseBoosters(filename string) ([]boosterRecordT, error) {
+	var boosters []boosterRecordT
+	records, err := readCSV(filename)
+	if err != nil {
+		return nil, err
+	}
+	for _, record := range records {
+		var booster = boosterRecordT{Engineering: record[1], Experimental: record[2]}
+		booster.ID, _ = strconv.Atoi(record[0])
+		booster.ShieldStrengthBonus, _ = strconv.ParseFloat(record[3], 64)
+		booster.ExpRes, _ = strconv.ParseFloat(record[4], 64)
+		booster.KinRes, _ = strconv.ParseFloat(record[5], 64)
+		booster.ThermRes, _ = strconv.ParseFloat(record[6], 64)
+		boosters = append(boosters, booster)
+	}
+	return boosters, nil
+}
+
 /*
  *
  */
 func loadboosterVariants(config *configT) []boosterT {
 
 	var boosterVariants []boosterT
-	var record []string
-	var err error
-
-	csvfile, err := os.Open(config.boosterFile)
-	if err != nil {
-		log.Fatal(err)
-	}
-
-	r := csv.NewReader(csvfile)
-
-	if err != nil {
-		log.Fatal(err)
-	}
-
-	// Consume and discard header row
-	record, err = r.Read()
-
-	for {
-		var booster boosterT
-
-		record, err = r.Read()
-
-		if err == io.EOF {
-			break
-		}
 
-		if err != nil {
-			log.Fatal(err)
-		}
+	for _, record := range gameData.Boosters {
 		// naive booster filtering (if 0 dps of type, eliminate booster combination)
-		if config.explosiveDPS == 0 {
-			if record[2] == "Blast Block" || record[1] == "Blast Resistance" {
+		if ignoresDamageType(config.explosiveDPS) {
+			if record.Experimental == "Blast Block" || record.Engineering == "Blast Resistance" {
 				continue
 			}
 		}
-		if config.thermalDPS == 0 {
-			if record[2] == "Thermo Block" || record[1] == "Thermal Resistance" {
+		if ignoresDamageType(config.thermalDPS) {
+			if record.Experimental == "Thermo Block" || record.Engineering == "Thermal Resistance" {
 				continue
 			}
 		}
-		if config.kineticDPS == 0 {
-			if record[2] == "Force Block" || record[1] == "Kinetic Resistance" {
+		if ignoresDamageType(config.kineticDPS) {
+			if record.Experimental == "Force Block" || record.Engineering == "Kinetic Resistance" {
 				continue
 			}
 		}
-		booster.ID, err = strconv.Atoi(record[0])
-		booster.engineering = record[1]
-		booster.experimental = record[2]
-		booster.shieldStrengthBonus, err = strconv.ParseFloat(record[3], 64)
-		booster.expResBonus, err = strconv.ParseFloat(record[4], 64)
-		booster.expResBonus = 1.0 - booster.expResBonus
-		booster.kinResBonus, err = strconv.ParseFloat(record[5], 64)
-		booster.kinResBonus = 1.0 - booster.kinResBonus
-		booster.thermResBonus, err = strconv.ParseFloat(record[6], 64)
-		booster.thermResBonus = 1.0 - booster.thermResBonus
-
-		boosterVariants = append(boosterVariants, booster)
+		boosterVariants = append(boosterVariants, boosterT{
+			ID:                  record.ID,
+			engineering:         record.Engineering,
+			experimental:        record.Experimental,
+			shieldStrengthBonus: record.ShieldStrengthBonus,
+			expResBonus:         1.0 - record.ExpRes,
+			kinResBonus:         1.0 - record.KinRes,
+			thermResBonus:       1.0 - record.ThermRes,
+		})
 	}
 
 	return boosterVariants
 }
 
-// Combinations with repetition code from
-// https://rosettacode.org/wiki/Combinations_with_repetitions#Concise_recursive
+// boosterSumT holds the booster part of a loadout's stats before diminishing returns are applied
+type boosterSumT struct {
+	hitPointBonus, expModifier, kinModifier, thermModifier float64
+}
+
+func (sum boosterSumT) add(booster boosterT) boosterSumT {
+	return boosterSumT{
+		hitPointBonus: sum.hitPointBonus + booster.shieldStrengthBonus,
+		expModifier:   sum.expModifier * booster.expResBonus,
+		kinModifier:   sum.kinModifier * booster.kinResBonus,
+		thermModifier: sum.thermModifier * booster.thermResBonus,
+	}
+}
+
+// boosterEnumT enumerates booster loadouts (non-decreasing booster indexes) in lexicographic order without building
+// the list of loadouts. The booster stats of the slots before the last one are kept as running sums, so going to the
+// next loadout only recomputes the slots that changed. The loadouts that only differ in their last slot follow each
+// other and are handed out as one run, which is tested by adding each booster to the same sum.
+type boosterEnumT struct {
+	boosterVariants []boosterT
+	slots           []int         // booster index of each slot
+	sums            []boosterSumT // sums[i] holds the stats of the boosters in the slots before slot i
+	changed         int           // first slot whose sum is out of date
+}
+
+// noBoosters stands in for the last slot of loadouts without boosters, it doesn't change their stats
+var noBoosters = []boosterT{{expResBonus: 1.0, kinResBonus: 1.0, thermResBonus: 1.0}}
+
+func newBoosterEnum(boosterVariants []boosterT, shieldBoosterCount int) *boosterEnumT {
+	if shieldBoosterCount == 0 {
+		boosterVariants, shieldBoosterCount = noBoosters, 1
+	}
+	e := &boosterEnumT{
+		boosterVariants: boosterVariants,
+		slots:           make([]int, shieldBoosterCount),
+		sums:            make([]boosterSumT, shieldBoosterCount),
+	}
+	e.sums[0] = boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+	return e
+}
+
+// seek goes to a loadout given by its booster IDs
+func (e *boosterEnumT) seek(loadout []int) {
+	for i, booster := range loadout {
+		e.slots[i] = booster - 1
+	}
+	e.changed = 0
+}
+
+// lastSlotRun returns the stats of the boosters in all slots but the last one and the boosters [first, last) of the
+// last slot of the next loadouts, at most count of them, and goes past them.
+func (e *boosterEnumT) lastSlotRun(count int) (sum boosterSumT, first, last int) {
+	var k = len(e.slots) - 1
+	for i := e.changed; i < k; i++ {
+		e.sums[i+1] = e.sums[i].add(e.boosterVariants[e.slots[i]])
+	}
+	e.changed = k
 
-func combrep(n int, lst []int) [][]int {
-	if n == 0 {
-		return [][]int{nil}
+	var n = len(e.boosterVariants)
+	first, last = e.slots[k], n
+	if last-first > count {
+		last = first + count
+	}
+	if last < n {
+		e.slots[k] = last
+		return e.sums[k], first, last
 	}
-	if len(lst) == 0 {
-		return nil
+
+	// One-Up: increase the last slot before the last one that isn't at the last booster yet and reset all slots
+	// after it
+	var changed = k - 1
+	for changed >= 0 && e.slots[changed] == n-1 {
+		changed--
 	}
-	r := combrep(n, lst[1:])
-	for _, x := range combrep(n-1, lst) {
-		r = append(r, append(x, lst[0]))
+	if changed >= 0 {
+		e.slots[changed]++
+		for i := changed + 1; i <= k; i++ {
+			e.slots[i] = e.slots[changed]
+		}
+		e.changed = changed
 	}
-	return r
+	return e.sums[k], first, last
 }
 
-func getBoosterLoadoutList(numBoosterVariants int) [][]int {
+// getBoosterLoadout returns the booster IDs of the loadout at position index in the order of boosterEnumT
+func getBoosterLoadout(numBoosterVariants, shieldBoosterCount, index int) []int {
+	shieldBoosterLoadout := make([]int, shieldBoosterCount)
+	var booster = 0
+	for i := range shieldBoosterLoadout {
+		// skip all loadouts that have a lower booster in this slot
+		for {
+			var count = countBoosterLoadouts(numBoosterVariants-booster, shieldBoosterCount-i-1)
+			if index < count {
+				break
+			}
+			index -= count
+			booster++
+		}
+		shieldBoosterLoadout[i] = booster + 1
+	}
+	return shieldBoosterLoadout
+}
 
-	input := make([]int, numBoosterVariants)
-	var i int
-	for i < numBoosterVariants {
-		input[i] = i + 1
-		i++
+// getBoosterLoadoutIndex returns the position of a loadout, given by its booster IDs in ascending order, in the order
+// of boosterEnumT
+func getBoosterLoadoutIndex(numBoosterVariants int, shieldBoosterLoadout []int) int {
+	var index = 0
+	var booster = 0
+	for i, id := range shieldBoosterLoadout {
+		// count all loadouts that have a lower booster in this slot
+		for ; booster < id-1; booster++ {
+			index += countBoosterLoadouts(numBoosterVariants-booster, len(shieldBoosterLoadout)-i-1)
+		}
 	}
-	variationsList := combrep(config.shieldBoosterCount, input)
+	return index
+}
 
-	return variationsList
+// countBoosterLoadouts returns the number of booster loadouts, i.e. combinations with repetition C(n+k-1, k)
+func countBoosterLoadouts(numBoosterVariants, shieldBoosterCount int) int {
+	var count = 1
+	for i := 1; i <= shieldBoosterCount; i++ {
+		count = count * (numBoosterVariants + i - 1) / i
+	}
+	return count
 }
@@ -0,0 +1,216 @@
+package main
+
+import (
+	"math"
+)
+
+// boosterLoadoutsT describes the shield booster loadouts of one booster count. The loadouts aren't stored: workers
+// enumerate their range of loadout indexes with a boosterEnumT, which starts at any index and keeps the booster stats
+// as running sums, so the memory doesn't grow with the number of loadouts. The bounds of a range of loadouts are
+// computed from its first and last loadout when it is tested.
+type boosterLoadoutsT struct {
+	boosterVariants []boosterT
+	boosterCount    int
+	count           int           // number of loadouts
+	bound           boosterBoundT // best booster stats of all loadouts
+
+	// best booster stats among boosterVariants[i:], the boosters that can follow booster i in a loadout
+	maxHitPointBonus []float64
+	minExpBonus      []float64
+	minKinBonus      []float64
+	minThermBonus    []float64
+}
+
+// boundBlockSize is the largest number of consecutive loadouts that share a bound. Workers skip a whole block when its
+// bound can't beat the best loadout found so far and check for cancellation between blocks.
+const boundBlockSize = 1 << 7
+
+// boosterBlockT holds the stats of a block of consecutive booster loadouts column by column, so testing a generator
+// is a single pass over a few flat arrays. Each worker fills its own block and tests every generator against it, the
+// booster stats of a loadout are computed once per test while only a block of them is kept, 4 kB per worker.
+type boosterBlockT struct {
+	enum          *boosterEnumT
+	first, last   int       // loadout indexes of the block
+	hitPointBonus []float64 // 1 + sum of the shield strength bonuses
+	expModifier   []float64 // explosive modifier product after diminishing returns
+	kinModifier   []float64 // kinetic modifier product after diminishing returns
+	thermModifier []float64 // thermal modifier product after diminishing returns
+}
+
+func newBoosterBlock(boosterLoadouts *boosterLoadoutsT) *boosterBlockT {
+	// the columns share one allocation
+	var columns = make([]float64, 4*boundBlockSize)
+	return &boosterBlockT{
+		enum:          newBoosterEnum(boosterLoadouts.boosterVariants, boosterLoadouts.boosterCount),
+		first:         -1,
+		last:          -1,
+		hitPointBonus: columns[0:0:boundBlockSize],
+		expModifier:   columns[boundBlockSize : boundBlockSize : 2*boundBlockSize],
+		kinModifier:   columns[2*boundBlockSize : 2*boundBlockSize : 3*boundBlockSize],
+		thermModifier: columns[3*boundBlockSize : 3*boundBlockSize : 4*boundBlockSize],
+	}
+}
+
+// load fills the block with the loadouts [first, last) unless it holds them already, loadout holds the booster IDs of
+// loadout first. The enumerator only has to seek when the block doesn't follow the previous one.
+func (block *boosterBlockT) load(first, last int, loadout []int) {
+	if block.first == first && block.last == last {
+		return
+	}
+	if block.last != first {
+		block.enum.seek(loadout)
+	}
+	block.first, block.last = first, last
+	block.hitPointBonus = block.hitPointBonus[:0]
+	block.expModifier = block.expModifier[:0]
+	block.kinModifier = block.kinModifier[:0]
+	block.thermModifier = block.thermModifier[:0]
+
+	for i := first; i < last; {
+		prefix, boosterFirst, boosterLast := block.enum.lastSlotRun(last - i)
+		for _, booster := range block.enum.boosterVariants[boosterFirst:boosterLast] {
+			var sum = prefix.add(booster)
+			block.hitPointBonus = append(block.hitPointBonus, sum.hitPointBonus)
+			block.expModifier = append(block.expModifier, applyDiminishingReturns(sum.expModifier))
+			block.kinModifier = append(block.kinModifier, applyDiminishingReturns(sum.kinModifier))
+			block.thermModifier = append(block.thermModifier, applyDiminishingReturns(sum.thermModifier))
+		}
+		i += boosterLast - boosterFirst
+	}
+}
+
+// boosterBoundT holds the best value of each booster stat over a range of loadouts. No loadout of the range can have
+// a longer survival time than a loadout with these stats.
+type boosterBoundT struct {
+	maxHitPointBonus float64
+	minExpModifier   float64
+	minKinModifier   float64
+	minThermModifier float64
+}
+
+func applyDiminishingReturns(modifier float64) float64 {
+	if modifier < 0.7 {
+		return 0.7 - (0.7-modifier)/2
+	}
+	return modifier
+}
+
+func newBoosterLoadouts(boosterVariants []boosterT, shieldBoosterCount int) *boosterLoadoutsT {
+	var n = len(boosterVariants)
+	boosterLoadouts := &boosterLoadoutsT{
+		boosterVariants:  boosterVariants,
+		boosterCount:     shieldBoosterCount,
+		count:            countBoosterLoadouts(n, shieldBoosterCount),
+		maxHitPointBonus: make([]float64, n+1),
+		minExpBonus:      make([]float64, n+1),
+		minKinBonus:      make([]float64, n+1),
+		minThermBonus:    make([]float64, n+1),
+	}
+
+	boosterLoadouts.maxHitPointBonus[n] = math.Inf(-1)
+	boosterLoadouts.minExpBonus[n] = math.Inf(1)
+	boosterLoadouts.minKinBonus[n] = math.Inf(1)
+	boosterLoadouts.minThermBonus[n] = math.Inf(1)
+	for i := n - 1; i >= 0; i-- {
+		var booster = boosterVariants[i]
+		boosterLoadouts.maxHitPointBonus[i] = math.Max(boosterLoadouts.maxHitPointBonus[i+1], booster.shieldStrengthBonus)
+		boosterLoadouts.minExpBonus[i] = math.Min(boosterLoadouts.minExpBonus[i+1], booster.expResBonus)
+		boosterLoadouts.minKinBonus[i] = math.Min(boosterLoadouts.minKinBonus[i+1], booster.kinResBonus)
+		boosterLoadouts.minThermBonus[i] = math.Min(boosterLoadouts.minThermBonus[i+1], booster.thermResBonus)
+	}
+
+	if n > 0 || shieldBoosterCount == 0 {
+		boosterLoadouts.bound = boosterLoadouts.prefixBound(getBoosterLoadout(n, shieldBoosterCount, 0), 0)
+	}
+	return boosterLoadouts
+}
+
+func (boosterLoadouts *boosterLoadoutsT) size() int {
+	return boosterLoadouts.count
+}
+
+// loadout returns the booster IDs of the loadout at index i
+func (boosterLoadouts *boosterLoadoutsT) loadout(i int) []int {
+	return getBoosterLoadout(len(boosterLoadouts.boosterVariants), boosterLoadouts.boosterCount, i)
+}
+
+// prefixBound returns the bound of all loadouts that start with the first boosters of a loadout (booster IDs) up to
+// slot prefix, the remaining slots can only hold boosters from the one in slot prefix on. The diminishing returns
+// compensation is monotonic, so the smallest reachable modifier products give the smallest modifiers.
+func (boosterLoadouts *boosterLoadoutsT) prefixBound(loadout []int, prefix int) boosterBoundT {
+	var sum = boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+	for _, booster := range loadout[:prefix] {
+		sum = sum.add(boosterLoadouts.boosterVariants[booster-1])
+	}
+	if prefix < len(loadout) {
+		var next = loadout[prefix] - 1
+		var remaining = float64(len(loadout) - prefix)
+		sum.hitPointBonus += remaining * boosterLoadouts.maxHitPointBonus[next]
+		sum.expModifier *= math.Pow(boosterLoadouts.minExpBonus[next], remaining)
+		sum.kinModifier *= math.Pow(boosterLoadouts.minKinBonus[next], remaining)
+		sum.thermModifier *= math.Pow(boosterLoadouts.minThermBonus[next], remaining)
+	}
+	return boosterBoundT{
+		maxHitPointBonus: sum.hitPointBonus,
+		minExpModifier:   applyDiminishingReturns(sum.expModifier),
+		minKinModifier:   applyDiminishingReturns(sum.kinModifier),
+		minThermModifier: applyDiminishingReturns(sum.thermModifier),
+	}
+}
+
+// nextBlock returns the end and the bound of the block of loadouts that starts at index first and ends before limit,
+// loadout holds the booster IDs of loadout first. A block is the largest group of loadouts that share their first
+// boosters, so it only differs in its last slots, and that starts at first and has at most boundBlockSize loadouts.
+// The shared boosters make its bound much tighter than the one of a block of the same size that isn't aligned to
+// them. loadout is moved on to the first loadout after the block.
+func (boosterLoadouts *boosterLoadoutsT) nextBlock(loadout []int, first, limit int) (int, boosterBoundT) {
+	var n = len(boosterLoadouts.boosterVariants)
+	var prefix, size = len(loadout), 1
+	for shared := 0; shared < len(loadout); shared++ {
+		// the loadouts with the same first boosters start with the lowest booster allowed in every other slot
+		var lowest = 1
+		if shared > 0 {
+			lowest = loadout[shared-1]
+		}
+		var aligned = true
+		for _, booster := range loadout[shared:] {
+			aligned = aligned && booster == lowest
+		}
+		if count := countBoosterLoadouts(n-lowest+1, len(loadout)-shared); aligned && count <= boundBlockSize {
+			prefix, size = shared, count
+			break
+		}
+	}
+	if first+size > limit {
+		// the end of the range cuts the block, loadout isn't needed any more
+		return limit, boosterLoadouts.rangeBound(first, limit)
+	}
+	var bound = boosterLoadouts.prefixBound(loadout, prefix)
+
+	// One-Up on the shared boosters: increase the last one that isn't at the last booster yet and reset all slots
+	// after it
+	var changed = prefix - 1
+	for changed >= 0 && loadout[changed] == n {
+		changed--
+	}
+	if changed >= 0 {
+		loadout[changed]++
+		for i := changed + 1; i < len(loadout); i++ {
+			loadout[i] = loadout[changed]
+		}
+	}
+	return first + size, bound
+}
+
+// rangeBound returns the bound of the loadouts with an index in [first, last). In lexicographic order they all share
+// the boosters that the first and the last loadout of the range have in common.
+func (boosterLoadouts *boosterLoadoutsT) rangeBound(first, last int) boosterBoundT {
+	var n = len(boosterLoadouts.boosterVariants)
+	var firstLoadout = getBoosterLoadout(n, boosterLoadouts.boosterCount, first)
+	var lastLoadout = getBoosterLoadout(n, boosterLoadouts.boosterCount, last-1)
+	var prefix = 0
+	for prefix < len(firstLoadout) && firstLoadout[prefix] == lastLoadout[prefix] {
+		prefix++
+	}
+	return boosterLoadouts.prefixBound(firstLoadout, prefix)
+}
@@ -0,0 +1,267 @@
+package main
+
+import (
+	"math"
+	"sort"
+	"sync/atomic"
+	"time"
+)
+
+// Exact alternative to testing the loadouts block by block: with -bnb the booster multisets are enumerated as a tree
+// where each level adds one booster, and a subtree is skipped when even the best booster stats still available for
+// its remaining slots can't beat the best survival time any worker has found so far. The workers of the pool take one
+// subtree at a time, the loadouts of a generator that start with the same booster, from the most promising generator
+// on. They share their best survival time through the test run and break ties on the loadout index like the default
+// search, so both report the same loadout.
+
+// boundSlack covers the rounding errors of survival times whose boosters were added in a different order
+const boundSlack = 1e-9
+
+// boundSearchT holds the state of a worker's search through the subtrees of one generator
+type boundSearchT struct {
+	run             *testRunT
+	generator       int // index of the generator, -1 before the first subtree
+	shieldGenerator generatorStatsT
+	boosterVariants []boosterT
+	boosterCount    int
+	order           []int // booster variant indexes, most promising first
+
+	// best booster stats among order[i:] for r remaining slots at index i*(boosterCount+1)+r, so the bound of a node
+	// is a few multiplications
+	maxHitPointBonus []float64
+	minExpModifier   []float64
+	minKinModifier   []float64
+	minThermModifier []float64
+
+	// best survival time of all workers when the search last looked, a subtree is only searched with a bound that is
+	// at most a subtree old
+	bestSurvivalTime float64
+	neverDies        bool
+
+	slots  []int // positions in order of the boosters of the current node
+	ids    []int // booster IDs of a loadout, for its index
+	best   rangeResultT
+	tested int64 // number of loadouts tested
+}
+
+func newBoundSearch(run *testRunT) *boundSearchT {
+	var n = len(run.boosterLoadouts.boosterVariants)
+	var k = run.boosterLoadouts.boosterCount
+	return &boundSearchT{
+		run:              run,
+		generator:        -1,
+		boosterVariants:  run.boosterLoadouts.boosterVariants,
+		boosterCount:     k,
+		order:            make([]int, n),
+		maxHitPointBonus: make([]float64, n*(k+1)),
+		minExpModifier:   make([]float64, n*(k+1)),
+		minKinModifier:   make([]float64, n*(k+1)),
+		minThermModifier: make([]float64, n*(k+1)),
+		slots:            make([]int, k),
+		ids:              make([]int, k),
+		best:             rangeResultT{loadout: -1},
+	}
+}
+
+// setGenerator prepares the booster order and suffix bounds for a generator
+func (s *boundSearchT) setGenerator(generator int) {
+	s.generator = generator
+	s.shieldGenerator = s.run.generatorStats[generator]
+	var k = s.boosterCount
+
+	// try boosters first which do best on their own, this finds a good best survival time early
+	var score = make([]float64, len(s.boosterVariants))
+	for i, booster := range s.boosterVariants {
+		var sum = boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+		for slot := 0; slot < k; slot++ {
+			sum = sum.add(booster)
+		}
+		survivalTime, actualDPS := getSurvivalTime(s.shieldGenerator, sum.hitPointBonus, applyDiminishingReturns(sum.expModifier),
+			applyDiminishingReturns(sum.kinModifier), applyDiminishingReturns(sum.thermModifier))
+		if actualDPS <= 0 {
+			survivalTime = math.Inf(1)
+		}
+		score[i] = survivalTime
+		s.order[i] = i
+	}
+	sort.SliceStable(s.order, func(a, b int) bool { return score[s.order[a]] > score[s.order[b]] })
+
+	var best = boosterT{shieldStrengthBonus: math.Inf(-1), expResBonus: math.Inf(1), kinResBonus: math.Inf(1), thermResBonus: math.Inf(1)}
+	for i := len(s.order) - 1; i >= 0; i-- {
+		var booster = s.boosterVariants[s.order[i]]
+		best.shieldStrengthBonus = math.Max(best.shieldStrengthBonus, booster.shieldStrengthBonus)
+		best.expResBonus = math.Min(best.expResBonus, booster.expResBonus)
+		best.kinResBonus = math.Min(best.kinResBonus, booster.kinResBonus)
+		best.thermResBonus = math.Min(best.thermResBonus, booster.thermResBonus)
+
+		var sum = boosterSumT{hitPointBonus: 0.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+		for r := 0; r <= k; r++ {
+			s.maxHitPointBonus[i*(k+1)+r] = sum.hitPointBonus
+			s.minExpModifier[i*(k+1)+r] = sum.expModifier
+			s.minKinModifier[i*(k+1)+r] = sum.kinModifier
+			s.minThermModifier[i*(k+1)+r] = sum.thermModifier
+			sum = sum.add(best)
+		}
+	}
+}
+
+// canImprove tells if any loadout of the node at depth with booster stats sum, whose remaining slots hold boosters
+// from order[start:], might be at least as good as the best loadout of any worker. The diminishing returns
+// compensation is monotonic, so the smallest reachable modifier products give the smallest modifiers. The bound is
+// raised by boundSlack, as the boosters are added in a different order than in the default search.
+func (s *boundSearchT) canImprove(depth, start int, sum boosterSumT) bool {
+	var i = start*(s.boosterCount+1) + s.boosterCount - depth
+	survivalTime, actualDPS := getSurvivalTime(s.shieldGenerator, (sum.hitPointBonus+s.maxHitPointBonus[i])*(1+boundSlack),
+		applyDiminishingReturns(sum.expModifier*s.minExpModifier[i]),
+		applyDiminishingReturns(sum.kinModifier*s.minKinModifier[i]),
+		applyDiminishingReturns(sum.thermModifier*s.minThermModifier[i]))
+
+	// the same test as testRunT.canImprove, against the best survival time of the last refresh
+	if actualDPS <= 0 {
+		return true
+	}
+	return !s.neverDies && survivalTime >= s.bestSurvivalTime
+}
+
+// refresh reads the best survival time that the workers have shared so far
+func (s *boundSearchT) refresh() {
+	s.neverDies = atomic.LoadInt32(&s.run.neverDies) != 0
+	s.bestSurvivalTime = math.Float64frombits(atomic.LoadUint64(&s.run.bestBits))
+}
+
+// search tests the loadouts below the node at depth with booster stats sum, its remaining slots hold boosters from
+// order[start:]
+func (s *boundSearchT) search(depth, start int, sum boosterSumT) {
+	if depth == s.boosterCount {
+		s.tested++
+		s.test()
+		return
+	}
+	if depth == s.boosterCount-1 {
+		for i := start; i < len(s.order); i++ {
+			if !s.canImprove(depth, i, sum) {
+				break
+			}
+			var loadout = sum.add(s.boosterVariants[s.order[i]])
+			s.tested++
+			survivalTime, actualDPS := getSurvivalTime(s.shieldGenerator, loadout.hitPointBonus, applyDiminishingReturns(loadout.expModifier),
+				applyDiminishingReturns(loadout.kinModifier), applyDiminishingReturns(loadout.thermModifier))
+			if isBetterSurvivalTime(survivalTime, actualDPS, s.best.survivalTime*(1-boundSlack)) {
+				s.slots[depth] = i
+				s.test()
+			}
+		}
+		return
+	}
+
+	for i := start; i < len(s.order) && !isCancelled(); i++ {
+		// the later children only hold boosters from order[i:] as well, none of them can improve once this bound can't
+		if !s.canImprove(depth, i, sum) {
+			break
+		}
+		s.slots[depth] = i
+		s.search(depth+1, i, sum.add(s.boosterVariants[s.order[i]]))
+	}
+}
+
+// test compares the loadout of the current slots with the best one of the worker. The default search adds the boosters
+// by ID, so the stats are added up again in that order and rounding doesn't change which loadout wins.
+func (s *boundSearchT) test() {
+	for i, slot := range s.slots {
+		s.ids[i] = s.order[slot] + 1
+	}
+	sort.Ints(s.ids)
+	var sum = boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+	for _, id := range s.ids {
+		sum = sum.add(s.boosterVariants[id-1])
+	}
+	survivalTime, actualDPS := getSurvivalTime(s.shieldGenerator, sum.hitPointBonus, applyDiminishingReturns(sum.expModifier),
+		applyDiminishingReturns(sum.kinModifier), applyDiminishingReturns(sum.thermModifier))
+	var tie = actualDPS != 0 && survivalTime == s.best.survivalTime
+	if !tie && !isBetterSurvivalTime(survivalTime, actualDPS, s.best.survivalTime) {
+		return
+	}
+	var loadout = s.generator*s.run.boosterLoadouts.size() + getBoosterLoadoutIndex(len(s.boosterVariants), s.ids)
+	if tie && loadout > s.best.loadout {
+		return
+	}
+	s.best = rangeResultT{loadout: loadout, survivalTime: survivalTime}
+	s.run.publish(survivalTime)
+	s.refresh()
+}
+
+// searchSubtree searches the loadouts of the current generator that start with the booster at position first of the
+// booster order and returns how many loadouts the subtree holds
+func (s *boundSearchT) searchSubtree(first int) int64 {
+	var root = boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+	if s.boosterCount == 0 {
+		s.search(0, 0, root)
+		return 1
+	}
+	if s.canImprove(0, first, root) {
+		s.slots[0] = first
+		s.search(1, first, root.add(s.boosterVariants[s.order[first]]))
+	}
+	return int64(countBoosterLoadouts(len(s.order)-first, s.boosterCount-1))
+}
+
+// subtreesPerGenerator returns the number of subtrees of a generator, one per first booster
+func (run *testRunT) subtreesPerGenerator() int64 {
+	if run.boosterLoadouts.boosterCount == 0 {
+		return 1
+	}
+	return int64(len(run.boosterLoadouts.boosterVariants))
+}
+
+// setSearchOrder sorts the generators by the survival time they could reach with the best booster stats, so that a
+// good result is found early
+func (run *testRunT) setSearchOrder() {
+	var rootBound = make([]float64, len(run.generatorStats))
+	run.searchOrder = make([]int, len(run.generatorStats))
+	for i := range run.generatorStats {
+		var bound = run.boosterLoadouts.bound
+		survivalTime, actualDPS := getSurvivalTime(run.generatorStats[i], bound.maxHitPointBonus, bound.minExpModifier,
+			bound.minKinModifier, bound.minThermModifier)
+		if actualDPS <= 0 {
+			survivalTime = math.Inf(1)
+		}
+		rootBound[i] = survivalTime
+		run.searchOrder[i] = i
+	}
+	sort.SliceStable(run.searchOrder, func(a, b int) bool { return rootBound[run.searchOrder[a]] > rootBound[run.searchOrder[b]] })
+}
+
+// search is run by each worker with -bnb instead of test and keeps taking subtrees until there are none left
+func (run *testRunT) search(worker int) {
+	var m = &run.workerMetrics[worker]
+	var s = newBoundSearch(run)
+	var perGenerator = run.subtreesPerGenerator()
+	var subtrees = perGenerator * int64(len(run.generatorStats))
+
+	for !isCancelled() {
+		var subtree = atomic.AddInt64(&run.next, 1) - 1
+		if subtree >= subtrees {
+			break
+		}
+
+		startTime := time.Now()
+		if generator := run.searchOrder[subtree/perGenerator]; generator != s.generator {
+			s.setGenerator(generator)
+		}
+		var tested = s.tested
+		s.refresh()
+		var loadouts = s.searchSubtree(int(subtree % perGenerator))
+		if isCancelled() {
+			break
+		}
+		var skipped = loadouts - (s.tested - tested)
+		atomic.AddInt64(&run.skipped, skipped)
+		atomic.AddInt64(&run.tested, loadouts)
+		m.busy += time.Since(startTime)
+		m.loadouts += loadouts
+		m.skipped += skipped
+		m.chunks++
+	}
+
+	run.results[worker] = s.best
+}
@@ -0,0 +1,42 @@
+package main
+
+import "testing"
+
+// TestBranchAndBoundMatchesDefault checks that -bnb reports the same loadout as testing block by block
+func TestBranchAndBoundMatchesDefault(t *testing.T) {
+	var setups = []struct {
+		name     string
+		boosters int
+		thargoid bool
+		prune    bool
+	}{
+		{"default", 4, false, true},
+		{"no boosters", 0, false, true},
+		{"thargoid", 4, true, true},
+		{"unpruned", 5, false, false},
+	}
+	for _, setup := range setups {
+		t.Run(setup.name, func(t *testing.T) {
+			var generators, boosterVariants = setupTop(t, setup.boosters, 1, setup.thargoid)
+			config.pruneDominated = setup.prune
+			if removesDominated() {
+				generators = pruneDominatedGenerators(generators)
+				boosterVariants = pruneDominatedBoosters(boosterVariants)
+			}
+			var boosterLoadouts = newBoosterLoadouts(boosterVariants, config.shieldBoosterCount)
+			var want, _ = testGenerators(generators, boosterVariants, boosterLoadouts)
+			config.branchAndBound = true
+			var got, _ = testGenerators(generators, boosterVariants, boosterLoadouts)
+			config.branchAndBound = false
+
+			if len(got) != 1 || len(want) != 1 {
+				t.Fatalf("got %d loadouts, want 1 from each search", len(got))
+			}
+			var gotBoosters, wantBoosters = boosterSummary(got[0].shieldBoosterLoadout, boosterVariants), boosterSummary(want[0].shieldBoosterLoadout, boosterVariants)
+			if got[0].survivalTime != want[0].survivalTime || got[0].shieldGenerator.ID != want[0].shieldGenerator.ID || gotBoosters != wantBoosters {
+				t.Fatalf("got %.4f s generator %d %s, want %.4f s generator %d %s", got[0].survivalTime, got[0].shieldGenerator.ID, gotBoosters,
+					want[0].survivalTime, want[0].shieldGenerator.ID, wantBoosters)
+			}
+		})
+	}
+}
@@ -1,5 +1,9 @@
 package main
 
+import (
+	"runtime"
+)
+
 type configT struct {
 	shieldBoosterCount                                int
 	prismatics                                        bool
@@ -8,8 +12,24 @@ type configT struct {
 	scbHitPoint, guardianShieldHitPoint               float64
 	boosterFile, generatorFile                        string
 	shipFile, shieldStats                             string
+	dataFile                                          string
 	shipName                                          string
 	shieldGeneratorSize                               float64
+	branchAndBound                                    bool
+	pruneDominated                                    bool
+	cores                                             int
+	showProgress                                      bool
+	paretoFile                                        string
+	frontFile                                         string
+	profilesFile                                      string
+	answersFile                                       string
+	fleet                                             string
+	topCount                                          int
+	qualities                                         string
+	masses                                            string
+	showMetrics                                       bool
+	cpuProfileFile                                    string
+	traceFile                                         string
 }
 
 var config configT
@@ -21,6 +41,9 @@ func loadConfig() configT {
 		shieldGeneratorSize:    7,
 		shipName:               "Federal Corvette",
 		prismatics:             true, // do you have prismatics unlocked?
+		pruneDominated:         true, // remove booster and generator variants that can't be part of the best loadout
+		cores:                  runtime.NumCPU(),
+		topCount:               1,
 		explosiveDPS:           0,    // missles
 		kineticDPS:             50,   // cannons and missles
 		thermalDPS:             50,   // laser weapons
@@ -32,7 +55,15 @@ func loadConfig() configT {
 		generatorFile:          "../lib/ShieldGeneratorVariants.csv",
 		shipFile:               "../lib/ShipStats.csv",
 		shieldStats:            "../lib/ShieldStats.csv",
+		dataFile:               "../lib/ShieldTester.bin", // compiled from the CSV files above
 	}
 
 	return config
 }
+
+// ignoresDamageType tells if variants that only resist a damage type with the given DPS can be left out. A Pareto
+// front has to serve every damage profile, so it keeps them all. So does -top, the loadouts after the best one can
+// use these variants.
+func ignoresDamageType(dps float64) bool {
+	return dps == 0 && config.paretoFile == "" && config.profilesFile == "" && config.topCount <= 1
+}
@@ -0,0 +1,182 @@
+package main
+
+import (
+	"bytes"
+	"encoding/csv"
+	"encoding/gob"
+	"fmt"
+	"io"
+	"io/ioutil"
+	"os"
+	"reflect"
+	"strconv"
+)
+
+// The CSV files in lib are compiled into one binary file the first time they are read. Later runs decode that file
+// instead of parsing the CSV files again, as long as the size and modification time of every CSV file match the ones
+// stored in it. Checking them only needs a stat of each file, so an up to date compiled file is used without reading
+// the CSV files at all. The stamps are written ahead of the data, so an outdated file is noticed before decoding it.
+// Ships and shield generator base stats are indexed by name, so looking them up doesn't go through the files again.
+
+// gameDataVersion changes whenever the layout of gameDataT changes, so files of older versions are compiled again
+const gameDataVersion = 2
+
+// dataFileStampT identifies the version of a CSV file the compiled data was made from
+type dataFileStampT struct {
+	Name    string
+	Size    int64
+	ModTime int64 // nanoseconds since 1970
+}
+
+type dataStampT struct {
+	Version int
+	Files   []dataFileStampT
+}
+
+type gameDataT struct {
+	Ships       map[string]shipRecordT        // by ship name
+	ShieldStats map[string]shieldStatsRecordT // by shieldStatsKey
+	Generators  []generatorRecordT
+	Boosters    []boosterRecordT
+}
+
+type shipRecordT struct {
+	HullMass, BaseShieldStrength float64
+	MaxShieldClass               float64 // largest shield generator that fits
+	BoosterSlots                 int     // utility slots
+}
+
+type shieldStatsRecordT struct {
+	MaxMass, OptMass, MinMass, MaxMul, OptMul, MinMul, Regen float64
+}
+
+type generatorRecordT struct {
+	ID                                   int
+	Type, Engineering, Experimental      string
+	RegenBonus, ExpRes, KinRes, ThermRes float64
+}
+
+type boosterRecordT struct {
+	ID                                            int
+	Engineering, Experimental                     string
+	ShieldStrengthBonus, ExpRes, KinRes, ThermRes float64
+}
+
+var gameData *gameDataT
+
+func shieldStatsKey(class float64, rating, name string) string {
+	return strconv.FormatFloat(class, 'g', -1, 64) + "/" + rating + "/" + name
+}
+
+// readCSV returns the records of a CSV file without its header row
+func readCSV(filename string) ([][]string, error) {
+	csvfile, err := os.Open(filename)
+	if err != nil {
+		return nil, err
+	}
+	defer csvfile.Close()
+
+	r := csv.NewReader(csvfile)
+
+	// Consume and discard the header row
+	if _, err = r.Read(); err != nil && err != io.EOF {
+		return nil, err
+	}
+
+	var records [][]string
+	for {
+		record, err := r.Read()
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			return nil, err
+		}
+		records = append(records, record)
+	}
+	return records, nil
+}
+
+// stampDataFiles returns the stamp of the CSV files the data is compiled from
+func stampDataFiles() (dataStampT, error) {
+	var stamp = dataStampT{Version: gameDataVersion}
+	for _, filename := range []string{config.shipFile, config.shieldStats, config.generatorFile, config.boosterFile} {
+		info, err := os.Stat(filename)
+		if err != nil {
+			return stamp, err
+		}
+		stamp.Files = append(stamp.Files, dataFileStampT{Name: filename, Size: info.Size(), ModTime: info.ModTime().UnixNano()})
+	}
+	return stamp, nil
+}
+
+// loadGameData returns the compiled data if it is up to date and compiles the CSV files otherwise
+func loadGameData() (*gameDataT, error) {
+	stamp, err := stampDataFiles()
+	if err != nil {
+		return nil, err
+	}
+	if data, err := readGameData(config.dataFile, stamp); err == nil {
+		return data, nil
+	}
+
+	var data = &gameDataT{}
+	if data.Ships, err = parseShips(config.shipFile); err != nil {
+		return nil, err
+	}
+	if data.ShieldStats, err = parseShieldStats(config.shieldStats); err != nil {
+		return nil, err
+	}
+	if data.Generators, err = parseGenerators(config.generatorFile); err != nil {
+		return nil, err
+	}
+	if data.Boosters, err = parseBoosters(config.boosterFile); err != nil {
+		return nil, err
+	}
+	if err = writeGameData(config.dataFile, stamp, data); err != nil {
+		fmt.Fprintln(os.Stderr, "Could not write compiled data:", err)
+	} else {
+		fmt.Println("Compiled data to", config.dataFile)
+	}
+	return data, nil
+}
+
+// readGameData returns the compiled data of a file, or an error if the file was compiled from other CSV files
+func readGameData(filename string, stamp dataStampT) (*gameDataT, error) {
+	file, err := os.Open(filename)
+	if err != nil {
+		return nil, err
+	}
+	defer file.Close()
+
+	var decoder = gob.NewDecoder(file)
+	var fileStamp dataStampT
+	if err = decoder.Decode(&fileStamp); err != nil {
+		return nil, err
+	}
+	if !reflect.DeepEqual(fileStamp, stamp) {
+		return nil, fmt.Errorf("%s is out of date", filename)
+	}
+	var data gameDataT
+	if err = decoder.Decode(&data); err != nil {
+		return nil, err
+	}
+	return &data, nil
+}
+
+func writeGameData(filename string, stamp dataStampT, data *gameDataT) error {
+	var buffer bytes.Buffer
+	var encoder = gob.NewEncoder(&buffer)
+	if err := encoder.Encode(stamp); err != nil {
+		return err
+	}
+	if err := encoder.Encode(data); err != nil {
+		return err
+	}
+	// write the whole file at once, so other runs never decode a half written file
+	var tempFilename = filename + ".tmp"
+	if err := ioutil.WriteFile(tempFilename, buffer.Bytes(), 0644); err != nil {
+		return err
+	}
+	return os.Rename(tempFilename, filename)
+}
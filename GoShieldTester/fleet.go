@@ -0,0 +1,146 @@
+package main
+
+import (
+	"fmt"
+	"os"
+	"sort"
+	"strings"
+	"text/tabwriter"
+	"time"
+)
+
+// In fleet mode every ship is tested with its own shield generator class and number of boosters, from the ship data
+// and capped by -size and -boosters, and with the same booster variants and damage profile. The booster loadouts don't
+// depend on the ship, so ships are grouped by their number of boosters and tested one group after the other. For each
+// ship only its shield generators are loaded, which depend on its class, hull mass and base shield strength.
+
+// fleetShips returns the ships to test, "all" stands for every ship of the ship data
+func fleetShips(fleet string) ([]string, error) {
+	var ships []string
+	if fleet == "all" {
+		for name := range gameData.Ships {
+			ships = append(ships, name)
+		}
+		sort.Strings(ships)
+		return ships, nil
+	}
+
+	for _, name := range strings.Split(fleet, ",") {
+		name = strings.TrimSpace(name)
+		if _, ok := gameData.Ships[name]; !ok {
+			fmt.Println("Unknown ship:", name)
+			continue
+		}
+		ships = append(ships, name)
+	}
+	if len(ships) == 0 {
+		return nil, fmt.Errorf("no known ship in %q", fleet)
+	}
+	return ships, nil
+}
+
+// fleetLoadout returns the shield generator class and number of boosters a ship is tested with
+func fleetLoadout(ship string) (float64, int) {
+	var record = gameData.Ships[ship]
+	var shieldClass, boosters = record.MaxShieldClass, record.BoosterSlots
+	if config.shieldGeneratorSize < shieldClass {
+		shieldClass = config.shieldGeneratorSize
+	}
+	if config.shieldBoosterCount < boosters {
+		boosters = config.shieldBoosterCount
+	}
+	return shieldClass, boosters
+}
+
+// boosterSummary lists the boosters of a loadout, identical boosters are counted
+func boosterSummary(shieldBoosterLoadout []int, boosterVariants []boosterT) string {
+	var counts = make(map[int]int)
+	var order []int
+	for _, booster := range shieldBoosterLoadout {
+		if counts[booster] == 0 {
+			order = append(order, booster)
+		}
+		counts[booster]++
+	}
+
+	var parts []string
+	for _, booster := range order {
+		var variant = boosterVariants[booster-1]
+		parts = append(parts, fmt.Sprintf("%dx %s / %s", counts[booster], variant.engineering, variant.experimental))
+	}
+	return strings.Join(parts, ", ")
+}
+
+func testFleet(ships []string, boosterVariants []boosterT) {
+	startTime := time.Now()
+	var groups = make(map[int][]string) // ships by number of boosters
+	var shieldClasses = make(map[string]float64)
+	var boosterCounts []int
+	for _, ship := range ships {
+		var shieldClass, boosters = fleetLoadout(ship)
+		shieldClasses[ship] = shieldClass
+		if groups[boosters] == nil {
+			boosterCounts = append(boosterCounts, boosters)
+		}
+		groups[boosters] = append(groups[boosters], ship)
+	}
+	sort.Sort(sort.Reverse(sort.IntSlice(boosterCounts)))
+
+	var shieldGeneratorSize = config.shieldGeneratorSize
+	defer func() { config.shieldGeneratorSize = shieldGeneratorSize }()
+
+	var tested, shipsTested int
+	for _, boosters := range boosterCounts {
+		if isCancelled() {
+			break
+		}
+		var groupStartTime = time.Now()
+		var boosterLoadouts = newBoosterLoadouts(boosterVariants, boosters)
+		fmt.Println("Testing", boosterLoadouts.size(), "loadouts of", boosters, "boosters for", len(groups[boosters]), "ships")
+		metrics.phase("Booster loadouts", groupStartTime)
+		fmt.Println()
+
+		w := tabwriter.NewWriter(os.Stdout, 0, 0, 2, ' ', 0)
+		fmt.Fprintln(w, "Ship\tClass\tSurvival Time\tShield Generator\tShield Boosters\tHitpoints\tRegen\t")
+		for _, ship := range groups[boosters] {
+			if isCancelled() {
+				break
+			}
+			// the shield generator class is read from the config while loading the generators
+			var shipStartTime = time.Now()
+			config.shieldGeneratorSize = shieldClasses[ship]
+			var baseShieldStrength, hullMass = loadShipStats(ship)
+			var generators = loadGenerators(baseShieldStrength, hullMass)
+			if removesDominated() {
+				generators = pruneDominatedGenerators(generators)
+			}
+			metrics.phase("Load variants", shipStartTime)
+
+			results, shipTested := testGenerators(generators, boosterVariants, boosterLoadouts)
+			tested += shipTested
+			shipsTested++
+
+			if len(results) == 0 {
+				fmt.Fprintf(w, "%s\t%g\t-\t\t\t\t\t\n", ship, config.shieldGeneratorSize)
+				continue
+			}
+			var result = results[0]
+			var survivalTime = "Didn't die"
+			if result.survivalTime > 0 {
+				survivalTime = fmt.Sprintf("%.2f s", result.survivalTime)
+			}
+			var generator = result.shieldGenerator
+			fmt.Fprintf(w, "%s\t%g\t%s\t%s / %s / %s\t%s\t%.1f Mj\t%.2f Mj/s\t\n", ship, config.shieldGeneratorSize, survivalTime,
+				generator.name, generator.engineering, generator.experimental,
+				boosterSummary(result.shieldBoosterLoadout, boosterVariants),
+				result.loadOutStats.hitPoints-config.scbHitPoint, result.loadOutStats.regenRate)
+		}
+		w.Flush()
+		fmt.Println()
+	}
+
+	fmt.Println("Tested", tested, "loadouts of", shipsTested, "ships in", time.Since(startTime))
+	if isCancelled() {
+		fmt.Println("Cancelled, the remaining ships were not tested")
+	}
+}
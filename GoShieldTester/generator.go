@@ -1,18 +1,19 @@
 package main
 
 import (
-	"encoding/csv"
-	"io"
-	"log"
 	"math"
-	"os"
 	"strconv"
 	"strings"
 )
 
 type generatorT struct {
-	ID                                  int
-	name, engineering, experimental     string
+	ID                              int
+	name, engineering, experimental string
+	generatorStatsT
+}
+
+// generatorStatsT holds the numbers of a generator variant, which is all that is needed to test loadouts
+type generatorStatsT struct {
 	shieldStrength                      float64
 	regenRate, expRes, kinRes, thermRes float64
 }
@@ -21,44 +22,53 @@ type shieldGenBase struct {
 	maxmass, optmass, minmass, maxmul, optmul, minmul, regen float64
 }
 
-func getShieldStrengthAndRegen(name string, shieldStrength, hullMass, regenBonus float64) (float64, float64) {
+func parseShieldStats(filename string) (map[string]shieldStatsRecordT, error) {
+	var shieldStats = make(map[string]shieldStatsRecordT)
+	records, err := readCSV(filename)
+	if err != nil {
+		return nil, err
+	}
+	for _, record := range records {
+		class, _ := strconv.ParseFloat(record[1], 64)
+		var key = shieldStatsKey(class, record[2], record[3])
+		if _, ok := shieldStats[key]; ok {
+			continue
+		}
+		var stats shieldStatsRecordT
+		stats.OptMass, _ = strconv.ParseFloat(record[5], 64)
+		stats.MaxMass, _ = strconv.ParseFloat(record[4], 64)
+		stats.MinMass, _ = strconv.ParseFloat(record[6], 64)
+		stats.MaxMul, _ = strconv.ParseFloat(record[7], 64)
+		stats.OptMul, _ = strconv.ParseFloat(record[8], 64)
+		stats.MinMul, _ = strconv.ParseFloat(record[9], 64)
+		stats.Regen, _ = strconv.ParseFloat(record[10], 64)
+		shieldStats[key] = stats
+	}
+	return shieldStats, nil
+}
+
+// getShieldGenBase returns the base stats of a shield generator type of the configured size
+func getShieldGenBase(name string) shieldGenBase {
 	var shieldRating string
 	if name == "Bi-Weave" {
 		shieldRating = "C"
 	} else {
 		shieldRating = "A"
 	}
-	//import shield generator base info
-	var record []string
-	var err error
-	shieldsfile, err := os.Open(config.shieldStats)
-	if err != nil {
-		log.Fatal(err)
+	var stats = gameData.ShieldStats[shieldStatsKey(config.shieldGeneratorSize, shieldRating, name)]
+	return shieldGenBase{
+		maxmass: stats.MaxMass,
+		optmass: stats.OptMass,
+		minmass: stats.MinMass,
+		maxmul:  stats.MaxMul,
+		optmul:  stats.OptMul,
+		minmul:  stats.MinMul,
+		regen:   stats.Regen,
 	}
-	r := csv.NewReader(shieldsfile)
-	var shieldBaseStats shieldGenBase
-	for {
-		record, err = r.Read()
-
-		if err == io.EOF {
-			break
-		}
+}
 
-		if err != nil {
-			log.Fatal(err)
-		}
-		recName, _ := strconv.ParseFloat(record[1], 64)
-		if recName == config.shieldGeneratorSize && record[2] == shieldRating && record[3] == name {
-			shieldBaseStats.optmass, _ = strconv.ParseFloat(record[5], 64)
-			shieldBaseStats.maxmass, _ = strconv.ParseFloat(record[4], 64)
-			shieldBaseStats.minmass, _ = strconv.ParseFloat(record[6], 64)
-			shieldBaseStats.maxmul, _ = strconv.ParseFloat(record[7], 64)
-			shieldBaseStats.optmul, _ = strconv.ParseFloat(record[8], 64)
-			shieldBaseStats.minmul, _ = strconv.ParseFloat(record[9], 64)
-			shieldBaseStats.regen, _ = strconv.ParseFloat(record[10], 64)
-			break
-		}
-	}
+// getShieldMultiplier returns the factor the base shield strength of a ship is multiplied with for its hull mass
+func getShieldMultiplier(shieldBaseStats shieldGenBase, hullMass float64) float64 {
 	// calcualte the normalized mass
 	MassNorm := math.Min(1, ((shieldBaseStats.maxmass - hullMass) / (shieldBaseStats.maxmass - shieldBaseStats.minmass)))
 	// Calculate power function exponent
@@ -66,74 +76,68 @@ func getShieldStrengthAndRegen(name string, shieldStrength, hullMass, regenBonus
 	// Calcualte final multiplier
 	Multiplier := shieldBaseStats.minmul + math.Pow(MassNorm, Exponent)*(shieldBaseStats.maxmul-shieldBaseStats.minmul)
 
-	ShieldHitPoints := shieldStrength * Multiplier
+	return Multiplier
+}
+
+func getShieldStrengthAndRegen(name string, shieldStrength, hullMass, regenBonus float64) (float64, float64) {
+	var shieldBaseStats = getShieldGenBase(name)
+
+	ShieldHitPoints := shieldStrength * getShieldMultiplier(shieldBaseStats, hullMass)
 	ShieldRegen := shieldBaseStats.regen * (1 + regenBonus)
 
 	return ShieldHitPoints, ShieldRegen
 
 }
 
-func loadGenerators(baseShieldStrength, hullMass float64) []generatorT {
-
-	var generators []generatorT
-	var record []string
-	var err error
-
-	csvfile, err := os.Open(config.generatorFile)
+func parseGenerators(filename string) ([]generatorRecordT, error) {
+	var generators []generatorRecordT
+	records, err := readCSV(filename)
 	if err != nil {
-		log.Fatal(err)
+		return nil, err
 	}
-
-	r := csv.NewReader(csvfile)
-
-	if err != nil {
-		log.Fatal(err)
+	for _, record := range records {
+		// 0ID,1Type,2Engineering,3Experimental,4RegenRateBobus,5ExpRes,6KinRes,7ThermRes,8OptimalMultiplierBonus
+		var generator = generatorRecordT{Type: record[1], Engineering: record[2], Experimental: record[3]}
+		generator.ID, _ = strconv.Atoi(record[0])
+		generator.RegenBonus, _ = strconv.ParseFloat(record[4], 64)
+		generator.ExpRes, _ = strconv.ParseFloat(record[5], 64)
+		generator.KinRes, _ = strconv.ParseFloat(record[6], 64)
+		generator.ThermRes, _ = strconv.ParseFloat(record[7], 64)
+		generators = append(generators, generator)
 	}
+	return generators, nil
+}
 
-	// Consume and discard the header row
-	record, err = r.Read()
-
-	for {
-		var generator generatorT
-
-		record, err = r.Read()
+func loadGenerators(baseShieldStrength, hullMass float64) []generatorT {
 
-		if err == io.EOF {
-			break
-		}
+	var generators []generatorT
 
-		if err != nil {
-			log.Fatal(err)
-		}
+	for _, record := range gameData.Generators {
+		var generator generatorT
 
 		// if prismatics are disabled, skip those entries
-		if !config.prismatics && strings.Contains(record[1], "Prismatic") {
+		if !config.prismatics && strings.Contains(record.Type, "Prismatic") {
 			continue
 		}
 		// naive filtering for shield generator resistances
-		if config.thermalDPS == 0 {
-			if record[2] == "Thermo Block" || record[1] == "Thermal Resistance" {
+		if ignoresDamageType(config.thermalDPS) {
+			if record.Engineering == "Thermo Block" || record.Type == "Thermal Resistance" {
 				continue
 			}
 		}
-		if config.kineticDPS == 0 {
-			if record[2] == "Force Block" || record[1] == "Kinetic Resistance" {
+		if ignoresDamageType(config.kineticDPS) {
+			if record.Engineering == "Force Block" || record.Type == "Kinetic Resistance" {
 				continue
 			}
 		}
-		// 0ID,1Type,2Engineering,3Experimental,4RegenRateBobus,5ExpRes,6KinRes,7ThermRes,8OptimalMultiplierBonus
-		regenBonus, _ := strconv.ParseFloat(record[4], 64)
-		generator.ID, err = strconv.Atoi(record[0])
-		generator.name = record[1]
-		generator.engineering = record[2]
-		generator.experimental = record[3]
-		generator.shieldStrength, generator.regenRate = getShieldStrengthAndRegen(record[1], baseShieldStrength, hullMass, regenBonus)
-		generator.expRes, err = strconv.ParseFloat(record[5], 64)
-		generator.expRes = 1.0 - generator.expRes
-		generator.kinRes, err = strconv.ParseFloat(record[6], 64)
-		generator.kinRes = 1.0 - generator.kinRes
-		generator.thermRes, err = strconv.ParseFloat(record[7], 64)
-		generator.thermRes = 1.0 - generator.thermRes
+		generator.ID = record.ID
+		generator.name = record.Type
+		generator.engineering = record.Engineering
+		generator.experimental = record.Experimental
+		generator.shieldStrength, generator.regenRate = getShieldStrengthAndRegen(record.Type, baseShieldStrength, hullMass, record.RegenBonus)
+		generator.expRes = 1.0 - record.ExpRes
+		generator.kinRes = 1.0 - record.KinRes
+		generator.thermRes = 1.0 - record.ThermRes
 
 		generators = append(generators, generator)
 	}
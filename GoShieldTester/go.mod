@@ -0,0 +1,3 @@
+module GoShieldTester
+
+go 1.13
@@ -29,17 +29,9 @@ func getLoadoutStats(shieldGeneratorVariant generatorT, shieldBoosterLoadout []i
 	}
 
 	// Compensate for diminishing returns
-	if expModifier < 0.7 {
-		expModifier = 0.7 - (0.7-expModifier)/2
-	}
-
-	if kinModifier < 0.7 {
-		kinModifier = 0.7 - (0.7-kinModifier)/2
-	}
-
-	if thermModifier < 0.7 {
-		thermModifier = 0.7 - (0.7-thermModifier)/2
-	}
+	expModifier = applyDiminishingReturns(expModifier)
+	kinModifier = applyDiminishingReturns(kinModifier)
+	thermModifier = applyDiminishingReturns(thermModifier)
 
 	// Compute final Resistance
 	expRes = shieldGeneratorVariant.expRes * expModifier
@@ -57,3 +49,32 @@ func getLoadoutStats(shieldGeneratorVariant generatorT, shieldBoosterLoadout []i
 		thermalResistance:   thermRes,
 	}
 }
+
+// getSurvivalTime computes the survival time of a generator with the given booster HP bonus and modifiers
+// (diminishing returns already applied). A negative actual DPS means that the shield never goes down, such loadouts
+// get a negative survival time which is lower with more hitpoints and more regen left over, so that a dominating
+// variant never ranks below the one it dominates.
+func getSurvivalTime(shieldGenerator generatorStatsT, hitPointBonus, expModifier, kinModifier, thermModifier float64) (survivalTime, actualDPS float64) {
+	var hitPoints = hitPointBonus*shieldGenerator.shieldStrength + config.scbHitPoint + config.guardianShieldHitPoint
+
+	actualDPS = config.damageEffectiveness*
+		(config.explosiveDPS*(shieldGenerator.expRes*expModifier)+
+			config.kineticDPS*(shieldGenerator.kinRes*kinModifier)+
+			config.thermalDPS*(shieldGenerator.thermRes*thermModifier)+
+			config.absoluteDPS) - shieldGenerator.regenRate*(1-config.damageEffectiveness)
+
+	if actualDPS < 0 {
+		return (hitPoints + config.scbHitPoint) * actualDPS, actualDPS
+	}
+	return (hitPoints + config.scbHitPoint) / actualDPS, actualDPS
+}
+
+// isBetterSurvivalTime tells if a loadout beats the best survival time so far
+func isBetterSurvivalTime(survivalTime, actualDPS, bestSurvivalTime float64) bool {
+	if actualDPS > 0 && bestSurvivalTime >= 0 {
+		return survivalTime > bestSurvivalTime
+	} else if actualDPS < 0 {
+		return survivalTime < bestSurvivalTime
+	}
+	return false
+}
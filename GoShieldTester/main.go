@@ -12,6 +12,11 @@ package main
 import (
 	"flag"
 	"fmt"
+	"log"
+	"os"
+	"os/signal"
+	"runtime/pprof"
+	"runtime/trace"
 	"time"
 )
 
@@ -31,6 +36,21 @@ func processFlags() {
 	thargoid := flag.Bool("thargoid", false, "Useful Thargoid defaults")
 	cucumber := flag.Bool("cucumber", false, "Useful Cucumber defaults")
 	shortboost := flag.Bool("shortboost", false, "Load the short booster list")
+	noprune := flag.Bool("noprune", false, "Keep booster and generator variants that are dominated by another variant")
+	flag.IntVar(&config.cores, "cores", config.cores, "Number of CPU cores to use")
+	flag.BoolVar(&config.showProgress, "progress", config.showProgress, "Show a progress bar while testing")
+	flag.StringVar(&config.paretoFile, "pareto", config.paretoFile, "Write the Pareto front of all loadouts to this JSON file")
+	flag.StringVar(&config.frontFile, "front", config.frontFile, "Answer the test from a Pareto front written by -pareto instead of testing loadouts")
+	flag.StringVar(&config.profilesFile, "profiles", config.profilesFile, "Find the best loadout for every damage profile in this JSON file")
+	flag.StringVar(&config.answersFile, "csv", config.answersFile, "Write the best loadout of every profile of -front or -profiles to this CSV file")
+	flag.BoolVar(&config.branchAndBound, "bnb", config.branchAndBound, "Exact branch and bound search, skips loadouts that can't beat the best one found")
+	flag.IntVar(&config.topCount, "top", config.topCount, "Show this many of the best loadouts and the leaders while testing")
+	flag.StringVar(&config.qualities, "qualities", config.qualities, "Find the best loadout with all modules rolled at each of these comma separated qualities from 0 to 1")
+	flag.StringVar(&config.masses, "masses", config.masses, "Find the best loadout at each of these comma separated hull masses, or min:max:step")
+	flag.StringVar(&config.fleet, "fleet", config.fleet, "Test these comma separated ships, or all ships, each with its own shield generator class and boosters")
+	flag.BoolVar(&config.showMetrics, "metrics", config.showMetrics, "Show where the time of the run went")
+	flag.StringVar(&config.cpuProfileFile, "cpuprofile", config.cpuProfileFile, "Write a CPU profile to this file")
+	flag.StringVar(&config.traceFile, "trace", config.traceFile, "Write an execution trace to this file")
 
 	flag.Parse()
 	flgs := make(map[string]int)
@@ -54,6 +74,10 @@ func processFlags() {
 		config.prismatics = false
 	}
 
+	if *noprune {
+		config.pruneDominated = false
+	}
+
 	if *thargoid && *cucumber {
 		fmt.Println("D2EA is not a Thargoid, loading only Cucumber")
 		*thargoid = false
@@ -61,7 +85,7 @@ func processFlags() {
 
 	if *shortboost {
 		fmt.Println("Loading short booster list")
-		config.boosterFile = "../ShieldBoosterVariants_short.csv"
+		config.boosterFile = "../lib/ShieldBoosterVariants_short.csv"
 	}
 
 	if *cucumber {
@@ -106,6 +130,46 @@ func processFlags() {
 			config.shieldBoosterCount = 7
 		}
 	}
+
+	// a fleet uses the shield generator class and boosters of each ship, unless they are capped on the command line
+	if config.fleet != "" {
+		if _, ok := flgs["boosters"]; !ok {
+			config.shieldBoosterCount = 8
+		}
+		if _, ok := flgs["size"]; !ok {
+			config.shieldGeneratorSize = 8
+		}
+	}
+}
+
+// checkFlags rejects flags that can't be used together
+func checkFlags() error {
+	if config.topCount < 1 {
+		return fmt.Errorf("-top has to be at least 1")
+	}
+	if (config.frontFile != "" || config.profilesFile != "") && config.answersFile == "" {
+		return fmt.Errorf("-front and -profiles need -csv to write the answers to")
+	}
+	if config.topCount > 1 {
+		var modes = []struct {
+			flag string
+			set  bool
+		}{
+			{"-bnb", config.branchAndBound},
+			{"-pareto", config.paretoFile != ""},
+			{"-front", config.frontFile != ""},
+			{"-profiles", config.profilesFile != ""},
+			{"-fleet", config.fleet != ""},
+			{"-qualities", config.qualities != ""},
+			{"-masses", config.masses != ""},
+		}
+		for _, mode := range modes {
+			if mode.set {
+				return fmt.Errorf("-top can't be used with %s", mode.flag)
+			}
+		}
+	}
+	return nil
 }
 
 func main() {
@@ -116,19 +180,208 @@ func main() {
 	config = loadConfig()
 
 	processFlags()
+	if err := run(); err != nil {
+		log.Fatal(err)
+	}
+}
+
+// run runs the test of the flags. Errors are returned rather than ending the program, so the deferred calls that
+// finish the CPU profile and the trace always run.
+func run() error {
+	if err := checkFlags(); err != nil {
+		return err
+	}
+
+	if config.cpuProfileFile != "" {
+		file, err := os.Create(config.cpuProfileFile)
+		if err != nil {
+			return err
+		}
+		defer file.Close()
+		if err = pprof.StartCPUProfile(file); err != nil {
+			return err
+		}
+		defer pprof.StopCPUProfile()
+	}
+	if config.traceFile != "" {
+		file, err := os.Create(config.traceFile)
+		if err != nil {
+			return err
+		}
+		defer file.Close()
+		if err = trace.Start(file); err != nil {
+			return err
+		}
+		defer trace.Stop()
+	}
+
+	startTime := time.Now()
+	pool = newWorkerPool(config.cores)
+	startTime = metrics.phase("Start workers", startTime)
+
+	// the first Ctrl+C stops the test and shows the best loadout found until then
+	interrupt := make(chan os.Signal, 1)
+	signal.Notify(interrupt, os.Interrupt)
+	go func() {
+		<-interrupt
+		signal.Stop(interrupt)
+		cancel()
+	}()
+
+	var profiles = []profileT{configProfile()}
+	if config.profilesFile != "" {
+		var err error
+		if profiles, err = loadProfiles(config.profilesFile); err != nil {
+			return err
+		}
+	}
+
+	var qualities []float64
+	if config.qualities != "" {
+		var err error
+		if qualities, err = parseQualities(config.qualities); err != nil {
+			return err
+		}
+	}
+
+	var masses []float64
+	if config.masses != "" {
+		var err error
+		if masses, err = parseMasses(config.masses); err != nil {
+			return err
+		}
+	}
+
+	if config.frontFile != "" {
+		front, err := readParetoFront(config.frontFile)
+		if err != nil {
+			return err
+		}
+		startTime = metrics.phase("Read front", startTime)
+		if err = answerProfiles(front, profiles, config.answersFile); err != nil {
+			return err
+		}
+		if config.showMetrics {
+			metrics.phase("Answer profiles", startTime)
+			showMetrics()
+		}
+		return nil
+	}
+
+	var err error
+	if gameData, err = loadGameData(); err != nil {
+		return err
+	}
+	startTime = metrics.phase("Load data", startTime)
+
+	if config.fleet != "" {
+		var boosterVariants = loadboosterVariants(&config)
+		if removesDominated() {
+			boosterVariants = pruneDominatedBoosters(boosterVariants)
+		}
+		ships, err := fleetShips(config.fleet)
+		if err != nil {
+			return err
+		}
+		testFleet(ships, boosterVariants)
+		if config.showMetrics {
+			showMetrics()
+		}
+		return nil
+	}
+
+	if masses != nil {
+		var boosterVariants = loadboosterVariants(&config)
+		if removesDominated() {
+			boosterVariants = pruneDominatedBoosters(boosterVariants)
+		}
+		testMasses(masses, boosterVariants)
+		if config.showMetrics {
+			showMetrics()
+		}
+		return nil
+	}
+
 	var baseShieldStrength, hullMass = loadShipStats(config.shipName)
 	var generators = loadGenerators(baseShieldStrength, hullMass)
 	var boosterVariants = loadboosterVariants(&config)
 	fmt.Printf("Loaded %d shields and %d boosters\n", len(generators), len(boosterVariants))
+	startTime = metrics.phase("Load variants", startTime)
+	metrics.loadedLoadouts = int64(countBoosterLoadouts(len(boosterVariants), config.shieldBoosterCount) * len(generators))
 
-	var shieldBoosterLoadoutList = getBoosterLoadoutList(len(boosterVariants))
+	if removesDominated() {
+		var loadedGenerators, loadedBoosters = len(generators), len(boosterVariants)
+		generators = pruneDominatedGenerators(generators)
+		boosterVariants = pruneDominatedBoosters(boosterVariants)
+		fmt.Printf("Removed %d dominated shields and %d dominated boosters\n", loadedGenerators-len(generators), loadedBoosters-len(boosterVariants))
+		startTime = metrics.phase("Remove dominated", startTime)
+	}
+	metrics.loadouts = int64(countBoosterLoadouts(len(boosterVariants), config.shieldBoosterCount) * len(generators))
 
-	startTime := time.Now()
-	var result = testGenerators(generators, boosterVariants, shieldBoosterLoadoutList)
-	endTime := time.Now()
-	dur := endTime.Sub(startTime)
+	if qualities != nil {
+		testQualities(qualities, generators, boosterVariants)
+		if config.showMetrics {
+			showMetrics()
+		}
+		return nil
+	}
+
+	var result resultT
+	var results []resultT // the best loadouts with -top
+	var dur time.Duration
 
-	fmt.Println("Tested", len(shieldBoosterLoadoutList)*len(generators), "loadouts in", dur)
+	if config.paretoFile != "" || config.profilesFile != "" {
+		var front = buildParetoFront(generators, boosterVariants)
+		result = bestOnFront(front, generators, boosterVariants)
+		dur = time.Since(startTime)
+		startTime = metrics.phase("Pareto front", startTime)
+
+		var loadouts = countBoosterLoadouts(len(boosterVariants), config.shieldBoosterCount) * len(generators)
+		fmt.Println("Found", len(front), "Pareto optimal loadouts of", loadouts, "in", dur)
+
+		var file = newParetoFile(front, generators, boosterVariants)
+		if config.paretoFile != "" {
+			if err := writeParetoFront(config.paretoFile, file); err != nil {
+				return err
+			}
+			startTime = metrics.phase("Write front", startTime)
+		}
+		if config.profilesFile != "" {
+			if err := answerProfiles(file, profiles, config.answersFile); err != nil {
+				return err
+			}
+			if config.showMetrics {
+				metrics.phase("Answer profiles", startTime)
+				showMetrics()
+			}
+			return nil
+		}
+	} else {
+		var boosterLoadouts = newBoosterLoadouts(boosterVariants, config.shieldBoosterCount)
+		startTime = metrics.phase("Booster loadouts", startTime)
+
+		var tested int
+		results, tested = testGenerators(generators, boosterVariants, boosterLoadouts)
+		dur = time.Since(startTime)
+		startTime = time.Now()
+		if len(results) > 0 {
+			result = results[0]
+		}
+
+		fmt.Println("Tested", tested, "of", boosterLoadouts.size()*len(generators), "loadouts in", dur)
+	}
+
+	if isCancelled() {
+		fmt.Println("Cancelled, this is the best loadout found so far")
+	}
 
 	showResults(result, boosterVariants, dur)
+	if config.topCount > 1 && len(results) > 0 {
+		showTopResults(results, boosterVariants)
+	}
+	if config.showMetrics {
+		metrics.phase("Show results", startTime)
+		showMetrics()
+	}
+	return nil
 }
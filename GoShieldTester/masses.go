@@ -0,0 +1,147 @@
+package main
+
+import (
+	"fmt"
+	"math"
+	"strconv"
+	"strings"
+	"time"
+)
+
+// The hull mass only changes the shield strength of the generators, through the multiplier curve of each generator
+// type. A mass sweep computes the multipliers of all generator types at all masses once, before testing. The booster
+// loadouts don't depend on the mass, so their bounds are shared by every mass of the sweep.
+
+// parseMasses returns the masses of a comma separated list or of a range written as min:max:step
+func parseMasses(list string) ([]float64, error) {
+	var masses []float64
+	if fields := strings.Split(list, ":"); len(fields) == 3 {
+		var bounds [3]float64
+		for i, field := range fields {
+			value, err := strconv.ParseFloat(strings.TrimSpace(field), 64)
+			if err != nil {
+				return nil, fmt.Errorf("invalid mass range %q", list)
+			}
+			bounds[i] = value
+		}
+		var min, max, step = bounds[0], bounds[1], bounds[2]
+		if step <= 0 || max < min {
+			return nil, fmt.Errorf("invalid mass range %q, use min:max:step", list)
+		}
+		// count the steps up front so rounding errors of the step don't drop the last mass
+		var count = int(math.Floor((max-min)/step+1e-9)) + 1
+		for i := 0; i < count; i++ {
+			masses = append(masses, min+float64(i)*step)
+		}
+	} else {
+		for _, field := range strings.Split(list, ",") {
+			mass, err := strconv.ParseFloat(strings.TrimSpace(field), 64)
+			if err != nil {
+				return nil, fmt.Errorf("invalid mass %q", field)
+			}
+			masses = append(masses, mass)
+		}
+	}
+
+	for _, mass := range masses {
+		if mass <= 0 {
+			return nil, fmt.Errorf("mass %v is not positive", mass)
+		}
+	}
+	return masses, nil
+}
+
+// massCurveT holds the shield multiplier of each generator type at each mass of a sweep
+type massCurveT struct {
+	masses      []float64
+	multipliers map[string][]float64 // by generator type, 0 where the hull is too heavy for the generator
+}
+
+func newMassCurve(masses []float64, generators []generatorT) *massCurveT {
+	var curve = &massCurveT{masses: masses, multipliers: make(map[string][]float64)}
+	for _, generator := range generators {
+		if _, ok := curve.multipliers[generator.name]; ok {
+			continue
+		}
+		var shieldBaseStats = getShieldGenBase(generator.name)
+		var multipliers = make([]float64, len(masses))
+		for i, mass := range masses {
+			// a generator doesn't work on a hull above its maximum mass
+			if mass <= shieldBaseStats.maxmass {
+				multipliers[i] = getShieldMultiplier(shieldBaseStats, mass)
+			}
+		}
+		curve.multipliers[generator.name] = multipliers
+	}
+	return curve
+}
+
+// generatorsAt returns the generators that work at the i-th mass of the sweep with their shield strength at that mass
+func (curve *massCurveT) generatorsAt(i int, generators []generatorT, baseShieldStrength float64) []generatorT {
+	var atMass []generatorT
+	for _, generator := range generators {
+		var multiplier = curve.multipliers[generator.name][i]
+		if multiplier == 0 {
+			continue
+		}
+		generator.shieldStrength = baseShieldStrength * multiplier
+		atMass = append(atMass, generator)
+	}
+	return atMass
+}
+
+// testMasses finds the best loadout of the configured ship at every mass and shows how it changes
+func testMasses(masses []float64, boosterVariants []boosterT) {
+	var baseShieldStrength, hullMass = loadShipStats(config.shipName)
+	var generators = loadGenerators(baseShieldStrength, hullMass)
+	fmt.Printf("Loaded %d shields and %d boosters\n", len(generators), len(boosterVariants))
+	fmt.Printf("%s with a hull mass of %.0f t\n", config.shipName, hullMass)
+
+	startTime := time.Now()
+	var curve = newMassCurve(masses, generators)
+	var boosterLoadouts = newBoosterLoadouts(boosterVariants, config.shieldBoosterCount)
+	fmt.Println("Built the shield curves of", len(masses), "masses for", boosterLoadouts.size(), "booster loadouts in", time.Since(startTime))
+	metrics.phase("Booster loadouts", startTime)
+
+	var results = make([]*resultT, 0, len(masses)) // nil if no loadout was found
+	var tested int
+	for i := range masses {
+		if isCancelled() {
+			break
+		}
+		var stepStartTime = time.Now()
+		var massGenerators = curve.generatorsAt(i, generators, baseShieldStrength)
+		// the shield strength of the generator types changes differently with the mass, so are the dominated ones
+		if removesDominated() {
+			massGenerators = pruneDominatedGenerators(massGenerators)
+		}
+		metrics.phase("Load variants", stepStartTime)
+		if len(massGenerators) == 0 {
+			results = append(results, nil)
+			continue
+		}
+
+		var massResults, massTested = testGenerators(massGenerators, boosterVariants, boosterLoadouts)
+		tested += massTested
+		if len(massResults) == 0 {
+			results = append(results, nil)
+			continue
+		}
+		results = append(results, &massResults[0])
+	}
+	fmt.Println("Tested", tested, "loadouts at", len(masses), "masses in", time.Since(startTime))
+	fmt.Println()
+	startTime = time.Now()
+
+	var steps = make([]string, len(masses))
+	for i, mass := range masses {
+		steps[i] = fmt.Sprintf("%g t", mass)
+	}
+	showSweepResults("Mass", steps, results, boosterVariants)
+
+	if isCancelled() {
+		fmt.Println()
+		fmt.Println("Cancelled, the remaining masses were not tested")
+	}
+	metrics.phase("Show results", startTime)
+}
@@ -0,0 +1,111 @@
+package main
+
+import (
+	"fmt"
+	"sync/atomic"
+	"time"
+)
+
+// metricsT records where the time of a run goes. Phases are timed by main, the workers time their chunks in their
+// own slot of the test run, so collecting the numbers doesn't add any synchronization to the hot path. Runs that test
+// several times, like sweeps and fleets, add up the phases of the same name and the numbers of every test.
+type metricsT struct {
+	phases  []phaseT
+	workers []workerMetricsT
+
+	loadedLoadouts int64 // loadouts before dominated variants are removed
+	loadouts       int64 // loadouts of the test after dominated variants are removed
+	testedLoadouts int64 // loadouts of all test runs, tested or skipped
+	skipped        int64 // loadouts skipped because their bound couldn't beat the best survival time
+}
+
+type phaseT struct {
+	name string
+	dur  time.Duration
+}
+
+// workerMetricsT holds the numbers of one worker of a test run
+type workerMetricsT struct {
+	wait     time.Duration // from the start of the test until the worker picked up its job
+	busy     time.Duration // spent testing chunks
+	loadouts int64         // loadouts tested or skipped
+	skipped  int64
+	chunks   int
+}
+
+var metrics metricsT
+
+// phase records the time since startTime for a step of the run and returns the current time to start the next one
+func (m *metricsT) phase(name string, startTime time.Time) time.Time {
+	var now = time.Now()
+	for i := range m.phases {
+		if m.phases[i].name == name {
+			m.phases[i].dur += now.Sub(startTime)
+			return now
+		}
+	}
+	m.phases = append(m.phases, phaseT{name: name, dur: now.Sub(startTime)})
+	return now
+}
+
+// addTestRun adds the numbers of a test run to the ones of earlier runs
+func (m *metricsT) addTestRun(run *testRunT) {
+	m.testedLoadouts += int64(len(run.generatorStats) * run.boosterLoadouts.size())
+	m.skipped += atomic.LoadInt64(&run.skipped)
+	for i, worker := range run.workerMetrics {
+		if i == len(m.workers) {
+			m.workers = append(m.workers, workerMetricsT{})
+		}
+		var sum = &m.workers[i]
+		sum.wait += worker.wait
+		sum.busy += worker.busy
+		sum.loadouts += worker.loadouts
+		sum.skipped += worker.skipped
+		sum.chunks += worker.chunks
+	}
+}
+
+func percentOf(part, total int64) float64 {
+	if total == 0 {
+		return 0
+	}
+	return float64(part) * 100 / float64(total)
+}
+
+func perSecond(count int64, dur time.Duration) float64 {
+	if dur <= 0 {
+		return 0
+	}
+	return float64(count) / dur.Seconds()
+}
+
+func showMetrics() {
+	fmt.Println()
+	fmt.Println("---- METRICS ----")
+	fmt.Println()
+
+	var total time.Duration
+	for _, phase := range metrics.phases {
+		fmt.Printf("%21s: %v\n", phase.name, phase.dur)
+		total += phase.dur
+	}
+	fmt.Printf("%21s: %v\n", "Total", total)
+
+	if metrics.loadedLoadouts > 0 {
+		fmt.Println()
+		fmt.Printf("Dominated variants removed %.1f%% of %d loadouts\n",
+			percentOf(metrics.loadedLoadouts-metrics.loadouts, metrics.loadedLoadouts), metrics.loadedLoadouts)
+	}
+	if len(metrics.workers) == 0 {
+		return
+	}
+	fmt.Printf("Bounds skipped %.1f%% of %d loadouts\n", percentOf(metrics.skipped, metrics.testedLoadouts), metrics.testedLoadouts)
+
+	fmt.Println()
+	fmt.Println("Worker  Chunks   Loadouts  Skipped   Busy          Loadouts/s   Waited for job")
+	for i, worker := range metrics.workers {
+		fmt.Printf("%6d  %6d  %9d  %6.1f%%   %-12v  %11.0f   %v\n", i+1, worker.chunks, worker.loadouts,
+			percentOf(worker.skipped, worker.loadouts), worker.busy.Round(time.Microsecond),
+			perSecond(worker.loadouts-worker.skipped, worker.busy), worker.wait)
+	}
+}
@@ -0,0 +1,319 @@
+package main
+
+import (
+	"encoding/json"
+	"io/ioutil"
+	"sort"
+	"sync"
+)
+
+// Pareto front of the loadouts of a ship, generator class and booster count.
+//
+// A loadout is on the front when no other loadout has at least as many hitpoints and as much regen and takes at most
+// as much damage of every type, while being better in at least one of them. The survival time grows with the
+// hitpoints and the regen and shrinks with the damage taken for every damage profile, effectiveness, SCB and
+// guardian hitpoints, so the best loadout of any test is on the front and can be found by scanning the front instead
+// of testing every loadout again. Only for tests where the best loadout never goes down, the front holds a loadout
+// that doesn't go down either, but not necessarily the one a full test would pick.
+
+// paretoLoadoutT is a loadout on the front, its stats are those that getSurvivalTime works with
+type paretoLoadoutT struct {
+	generator     int   // index into the generators
+	boosters      []int // booster IDs
+	hitPointBonus float64
+	expModifier   float64
+	kinModifier   float64
+	thermModifier float64
+}
+
+// dominanceTreeT is a k-d tree over a fixed set of points that finds out if a point is dominated by any other point of
+// the set. Each node knows the largest value of every coordinate below it, so subtrees that can't hold a dominating
+// point are skipped. Points are stored one after the other with dim values each, larger values are better.
+type dominanceTreeT struct {
+	dim    int
+	points []float64
+	order  []int // point indexes, each node covers a range of them
+	nodes  []dominanceNodeT
+	max    []float64 // largest coordinates of each node, dim values per node
+}
+
+type dominanceNodeT struct {
+	first, last int // range of order covered by the node
+	left, right int // children, -1 for leaves
+}
+
+const dominanceLeafSize = 16
+
+func newDominanceTree(points []float64, dim int) *dominanceTreeT {
+	var n = len(points) / dim
+	t := &dominanceTreeT{
+		dim:    dim,
+		points: points,
+		order:  make([]int, n),
+	}
+	for i := range t.order {
+		t.order[i] = i
+	}
+	if n > 0 {
+		t.build(0, n, 0)
+	}
+	return t
+}
+
+func (t *dominanceTreeT) point(i int) []float64 {
+	return t.points[i*t.dim : (i+1)*t.dim]
+}
+
+func (t *dominanceTreeT) build(first, last, depth int) int {
+	var node = len(t.nodes)
+	t.nodes = append(t.nodes, dominanceNodeT{first: first, last: last, left: -1, right: -1})
+
+	var max = append([]float64(nil), t.point(t.order[first])...)
+	for _, i := range t.order[first+1 : last] {
+		for d, value := range t.point(i) {
+			if value > max[d] {
+				max[d] = value
+			}
+		}
+	}
+	t.max = append(t.max, max...)
+
+	if last-first > dominanceLeafSize {
+		var axis = depth % t.dim
+		var order = t.order[first:last]
+		sort.Slice(order, func(a, b int) bool { return t.points[order[a]*t.dim+axis] < t.points[order[b]*t.dim+axis] })
+		var mid = (first + last) / 2
+		var left = t.build(first, mid, depth+1)
+		var right = t.build(mid, last, depth+1)
+		t.nodes[node].left, t.nodes[node].right = left, right
+	}
+	return node
+}
+
+// dominated tells if point i is dominated by another point. Of identical points the one with the lowest index counts
+// as dominating the others.
+func (t *dominanceTreeT) dominated(i int) bool {
+	return len(t.nodes) > 0 && t.search(0, i, t.point(i))
+}
+
+func (t *dominanceTreeT) search(node, i int, point []float64) bool {
+	for d, max := range t.max[node*t.dim : (node+1)*t.dim] {
+		if max < point[d] {
+			return false
+		}
+	}
+
+	var n = t.nodes[node]
+	if n.left < 0 {
+		for _, j := range t.order[n.first:n.last] {
+			if j != i && dominates(t.point(j), point, j < i) {
+				return true
+			}
+		}
+		return false
+	}
+	// the right child holds the larger values of the split axis, which are more likely to dominate
+	return t.search(n.right, i, point) || t.search(n.left, i, point)
+}
+
+// paretoFront returns the indexes of the points that aren't dominated by any other point, in ascending order
+func paretoFront(points []float64, dim int) []int {
+	var t = newDominanceTree(points, dim)
+	var n = len(points) / dim
+	var dominated = make([]bool, n)
+
+	var workers = config.cores
+	if workers < 1 {
+		workers = 1
+	}
+	var wg sync.WaitGroup
+	wg.Add(workers)
+	for worker := 0; worker < workers; worker++ {
+		go func(worker int) {
+			defer wg.Done()
+			for i := worker; i < n; i += workers {
+				dominated[i] = t.dominated(i)
+			}
+		}(worker)
+	}
+	wg.Wait()
+
+	var front []int
+	for i := range dominated {
+		if !dominated[i] {
+			front = append(front, i)
+		}
+	}
+	return front
+}
+
+// boosterFrontT is a booster loadout that isn't dominated by any other loadout with the same number of boosters
+type boosterFrontT struct {
+	slots []int // indexes into the booster variants, non-decreasing
+	sum   boosterSumT
+}
+
+// paretoBoosterLoadouts finds the booster loadouts that aren't dominated by another loadout on their own. Removing a
+// booster from such a loadout leaves a loadout that isn't dominated either, so the loadouts are built up one booster
+// at a time from the front of one booster less instead of going through every loadout. The diminishing returns
+// compensation keeps the order of the modifiers, so it can be left out here.
+func paretoBoosterLoadouts(boosterVariants []boosterT, shieldBoosterCount int) []boosterFrontT {
+	var front = []boosterFrontT{{sum: boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}}}
+
+	for count := 0; count < shieldBoosterCount; count++ {
+		var candidates []boosterFrontT
+		var points []float64
+		for _, loadout := range front {
+			// only add boosters that keep the slots non-decreasing, so every loadout is built once
+			var start = 0
+			if len(loadout.slots) > 0 {
+				start = loadout.slots[len(loadout.slots)-1]
+			}
+			for i := start; i < len(boosterVariants); i++ {
+				var sum = loadout.sum.add(boosterVariants[i])
+				var slots = append(loadout.slots[:len(loadout.slots):len(loadout.slots)], i)
+				candidates = append(candidates, boosterFrontT{slots: slots, sum: sum})
+				points = append(points, sum.hitPointBonus, -sum.expModifier, -sum.kinModifier, -sum.thermModifier)
+			}
+		}
+
+		front = nil
+		for _, i := range paretoFront(points, 4) {
+			front = append(front, candidates[i])
+		}
+	}
+	return front
+}
+
+// buildParetoFront finds the Pareto optimal loadouts of all generators and booster loadouts
+func buildParetoFront(generators []generatorT, boosterVariants []boosterT) []paretoLoadoutT {
+	// a booster loadout that is dominated on its own is dominated with every generator
+	var loadouts []paretoLoadoutT
+	for _, loadout := range paretoBoosterLoadouts(boosterVariants, config.shieldBoosterCount) {
+		var boosters = make([]int, len(loadout.slots))
+		for i, slot := range loadout.slots {
+			boosters[i] = slot + 1
+		}
+		loadouts = append(loadouts, paretoLoadoutT{
+			boosters:      boosters,
+			hitPointBonus: loadout.sum.hitPointBonus,
+			expModifier:   applyDiminishingReturns(loadout.sum.expModifier),
+			kinModifier:   applyDiminishingReturns(loadout.sum.kinModifier),
+			thermModifier: applyDiminishingReturns(loadout.sum.thermModifier),
+		})
+	}
+
+	// the remaining booster loadouts are combined with every generator, using the products of getSurvivalTime
+	var points = make([]float64, 0, 5*len(generators)*len(loadouts))
+	for _, generator := range generators {
+		for _, loadout := range loadouts {
+			points = append(points, loadout.hitPointBonus*generator.shieldStrength, generator.regenRate,
+				-(generator.expRes * loadout.expModifier), -(generator.kinRes * loadout.kinModifier), -(generator.thermRes * loadout.thermModifier))
+		}
+	}
+
+	var front []paretoLoadoutT
+	for _, i := range paretoFront(points, 5) {
+		var loadout = loadouts[i%len(loadouts)]
+		loadout.generator = i / len(loadouts)
+		front = append(front, loadout)
+	}
+	return front
+}
+
+// bestOnFront scans the front for the best loadout of the current test
+func bestOnFront(front []paretoLoadoutT, generators []generatorT, boosterVariants []boosterT) resultT {
+	bestResult := resultT{survivalTime: 0.0}
+
+	var best = -1
+	for i, loadout := range front {
+		survivalTime, actualDPS := getSurvivalTime(generators[loadout.generator].generatorStatsT, loadout.hitPointBonus,
+			loadout.expModifier, loadout.kinModifier, loadout.thermModifier)
+		if isBetterSurvivalTime(survivalTime, actualDPS, bestResult.survivalTime) {
+			bestResult.survivalTime = survivalTime
+			best = i
+		}
+	}
+
+	if best >= 0 {
+		var shieldGenerator = generators[front[best].generator]
+		bestResult = resultT{
+			shieldGenerator:      shieldGenerator,
+			shieldBoosterLoadout: front[best].boosters,
+			loadOutStats:         getLoadoutStats(shieldGenerator, front[best].boosters, boosterVariants),
+			survivalTime:         bestResult.survivalTime,
+		}
+	}
+	return bestResult
+}
+
+// paretoFileT is the front as it is written to a file. Loadouts refer to the generator and booster variants by their
+// index in the lists at the top. Hitpoints are without SCB and guardian hitpoints, resistances are fractions like 0.5
+// for 50%.
+type paretoFileT struct {
+	Ship                string              `json:"ship"`
+	ShieldGeneratorSize float64             `json:"shieldGeneratorSize"`
+	Boosters            int                 `json:"boosters"`
+	Prismatics          bool                `json:"prismatics"`
+	GeneratorVariants   []paretoFileModuleT `json:"generatorVariants"`
+	BoosterVariants     []paretoFileModuleT `json:"boosterVariants"`
+	Loadouts            []paretoFileEntryT  `json:"loadouts"`
+}
+
+type paretoFileModuleT struct {
+	Type         string `json:"type,omitempty"`
+	Engineering  string `json:"engineering"`
+	Experimental string `json:"experimental"`
+}
+
+type paretoFileEntryT struct {
+	Generator           int     `json:"generator"`
+	Boosters            []int   `json:"boosters"`
+	HitPoints           float64 `json:"hitPoints"`
+	RegenRate           float64 `json:"regenRate"`
+	ExplosiveResistance float64 `json:"explosiveResistance"`
+	KineticResistance   float64 `json:"kineticResistance"`
+	ThermalResistance   float64 `json:"thermalResistance"`
+}
+
+func newParetoFile(front []paretoLoadoutT, generators []generatorT, boosterVariants []boosterT) *paretoFileT {
+	var file = &paretoFileT{
+		Ship:                config.shipName,
+		ShieldGeneratorSize: config.shieldGeneratorSize,
+		Boosters:            config.shieldBoosterCount,
+		Prismatics:          config.prismatics,
+		Loadouts:            make([]paretoFileEntryT, 0, len(front)),
+	}
+	for _, generator := range generators {
+		file.GeneratorVariants = append(file.GeneratorVariants, paretoFileModuleT{Type: generator.name, Engineering: generator.engineering, Experimental: generator.experimental})
+	}
+	for _, booster := range boosterVariants {
+		file.BoosterVariants = append(file.BoosterVariants, paretoFileModuleT{Engineering: booster.engineering, Experimental: booster.experimental})
+	}
+
+	for _, loadout := range front {
+		var generator = generators[loadout.generator]
+		var entry = paretoFileEntryT{
+			Generator:           loadout.generator,
+			Boosters:            make([]int, len(loadout.boosters)),
+			HitPoints:           loadout.hitPointBonus * generator.shieldStrength,
+			RegenRate:           generator.regenRate,
+			ExplosiveResistance: 1 - generator.expRes*loadout.expModifier,
+			KineticResistance:   1 - generator.kinRes*loadout.kinModifier,
+			ThermalResistance:   1 - generator.thermRes*loadout.thermModifier,
+		}
+		for i, booster := range loadout.boosters {
+			entry.Boosters[i] = booster - 1
+		}
+		file.Loadouts = append(file.Loadouts, entry)
+	}
+	return file
+}
+
+func writeParetoFront(filename string, file *paretoFileT) error {
+	data, err := json.Marshal(file)
+	if err != nil {
+		return err
+	}
+	return ioutil.WriteFile(filename, data, 0644)
+}
@@ -0,0 +1,82 @@
+package main
+
+import (
+	"sync"
+	"time"
+)
+
+// workerPoolT is a long-lived set of goroutines that test booster loadouts. Workers are started once and reused by
+// every test of the run; they only receive small job descriptors pointing into the data of the current test.
+type workerPoolT struct {
+	jobs    chan jobT
+	stop    chan struct{}
+	mutex   sync.Mutex
+	workers int
+}
+
+// jobT tells a worker to help with a test run, index is the worker's slot for its result
+type jobT struct {
+	run   *testRunT
+	index int
+}
+
+var pool *workerPoolT
+
+func newWorkerPool(workers int) *workerPoolT {
+	p := &workerPoolT{
+		jobs: make(chan jobT),
+		stop: make(chan struct{}),
+	}
+	p.resize(workers)
+	return p
+}
+
+// resize starts or stops workers until the pool has the given number of them
+func (p *workerPoolT) resize(workers int) {
+	if workers < 1 {
+		workers = 1
+	}
+
+	p.mutex.Lock()
+	defer p.mutex.Unlock()
+
+	for p.workers < workers {
+		go p.work()
+		p.workers++
+	}
+	for p.workers > workers {
+		p.stop <- struct{}{}
+		p.workers--
+	}
+}
+
+func (p *workerPoolT) size() int {
+	p.mutex.Lock()
+	defer p.mutex.Unlock()
+	return p.workers
+}
+
+func (p *workerPoolT) work() {
+	for {
+		select {
+		case job := <-p.jobs:
+			job.run.test(job.index)
+		case <-p.stop:
+			return
+		}
+	}
+}
+
+// run lets every worker take part in a test run and waits until all loadouts are tested
+func (p *workerPoolT) run(run *testRunT) {
+	var workers = p.size()
+	run.results = make([]rangeResultT, workers)
+	run.tops = make([]*topLoadoutsT, workers)
+	run.workerMetrics = make([]workerMetricsT, workers)
+	run.started = time.Now()
+	run.wg.Add(workers)
+	for i := 0; i < workers; i++ {
+		p.jobs <- jobT{run: run, index: i}
+	}
+	run.wg.Wait()
+}
@@ -0,0 +1,216 @@
+package main
+
+import (
+	"encoding/csv"
+	"encoding/json"
+	"fmt"
+	"io/ioutil"
+	"os"
+	"strings"
+	"time"
+)
+
+// The best loadout of a damage profile is on the Pareto front, so a k-d tree over the front answers profiles without
+// testing any loadout again. Every node of the tree knows the most hitpoints, most regen and least damage taken
+// below it, which gives the longest survival time any of its loadouts can have. The search follows the nodes
+// that might beat the best loadout found so far and skips the others, so most of the front is never looked at.
+
+// profileT is a damage profile with the same names and units as the profiles of the Python batch runner
+type profileT struct {
+	Name                string  `json:"name"`
+	ExplosiveDPS        float64 `json:"explosive_dps"`
+	KineticDPS          float64 `json:"kinetic_dps"`
+	ThermalDPS          float64 `json:"thermal_dps"`
+	AbsoluteDPS         float64 `json:"absolute_dps"`
+	DamageEffectiveness float64 `json:"damage_effectiveness"` // 0.65 for 65%
+	SCBHitPoints        float64 `json:"scb_hitpoints"`
+	GuardianHitPoints   float64 `json:"guardian_hitpoints"`
+}
+
+type profileIndexT struct {
+	front *paretoFileT
+	tree  *dominanceTreeT // points are hitpoints, regen and the negated damage multipliers
+}
+
+// profileAnswerT is the best loadout of a profile, loadout is -1 if none survives for any time
+type profileAnswerT struct {
+	loadout      int
+	survivalTime float64
+}
+
+func configProfile() profileT {
+	return profileT{
+		Name:                "command line",
+		ExplosiveDPS:        config.explosiveDPS,
+		KineticDPS:          config.kineticDPS,
+		ThermalDPS:          config.thermalDPS,
+		AbsoluteDPS:         config.absoluteDPS,
+		DamageEffectiveness: config.damageEffectiveness,
+		SCBHitPoints:        config.scbHitPoint,
+		GuardianHitPoints:   config.guardianShieldHitPoint,
+	}
+}
+
+// loadProfiles reads a JSON list of profiles, values that a profile leaves out are taken from the command line
+func loadProfiles(filename string) ([]profileT, error) {
+	data, err := ioutil.ReadFile(filename)
+	if err != nil {
+		return nil, err
+	}
+	var entries []json.RawMessage
+	if err = json.Unmarshal(data, &entries); err != nil {
+		return nil, err
+	}
+
+	var profiles = make([]profileT, len(entries))
+	for i, entry := range entries {
+		profiles[i] = configProfile()
+		profiles[i].Name = fmt.Sprint("profile ", i+1)
+		if err = json.Unmarshal(entry, &profiles[i]); err != nil {
+			return nil, err
+		}
+		var p = profiles[i]
+		if p.ExplosiveDPS < 0 || p.KineticDPS < 0 || p.ThermalDPS < 0 || p.AbsoluteDPS < 0 || p.DamageEffectiveness < 0 || p.DamageEffectiveness > 1 {
+			return nil, fmt.Errorf("%s: DPS must not be negative and damage effectiveness must be between 0 and 1", p.Name)
+		}
+	}
+	return profiles, nil
+}
+
+// survivalTime is getSurvivalTime for a point of the index
+func (profile *profileT) survivalTime(point []float64) (survivalTime, actualDPS float64) {
+	var hitPoints = point[0] + profile.SCBHitPoints + profile.GuardianHitPoints
+
+	actualDPS = profile.DamageEffectiveness*
+		(profile.ExplosiveDPS*-point[2]+
+			profile.KineticDPS*-point[3]+
+			profile.ThermalDPS*-point[4]+
+			profile.AbsoluteDPS) - point[1]*(1-profile.DamageEffectiveness)
+
+	if actualDPS < 0 {
+		return (hitPoints + profile.SCBHitPoints) * actualDPS, actualDPS
+	}
+	return (hitPoints + profile.SCBHitPoints) / actualDPS, actualDPS
+}
+
+func newProfileIndex(front *paretoFileT) *profileIndexT {
+	var points = make([]float64, 0, 5*len(front.Loadouts))
+	for _, loadout := range front.Loadouts {
+		points = append(points, loadout.HitPoints, loadout.RegenRate,
+			loadout.ExplosiveResistance-1, loadout.KineticResistance-1, loadout.ThermalResistance-1)
+	}
+	return &profileIndexT{
+		front: front,
+		tree:  newDominanceTree(points, 5),
+	}
+}
+
+// best finds the loadout of the front with the best survival time. On equal survival times the loadout that comes
+// first in the front wins.
+func (index *profileIndexT) best(profile *profileT) profileAnswerT {
+	answer := profileAnswerT{loadout: -1}
+	if len(index.tree.nodes) > 0 {
+		index.search(0, profile, &answer)
+	}
+	return answer
+}
+
+func (index *profileIndexT) search(node int, profile *profileT, answer *profileAnswerT) {
+	var t = index.tree
+
+	// a node whose loadouts all go down can't beat a loadout that doesn't or one that lasts longer than its bound
+	survivalTime, actualDPS := profile.survivalTime(t.max[node*t.dim : (node+1)*t.dim])
+	if actualDPS > 0 && (answer.survivalTime < 0 || survivalTime < answer.survivalTime) {
+		return
+	}
+
+	var n = t.nodes[node]
+	if n.left >= 0 {
+		index.search(n.right, profile, answer)
+		index.search(n.left, profile, answer)
+		return
+	}
+
+	for _, i := range t.order[n.first:n.last] {
+		survivalTime, actualDPS := profile.survivalTime(t.point(i))
+		if isBetterSurvivalTime(survivalTime, actualDPS, answer.survivalTime) ||
+			(answer.loadout >= 0 && survivalTime == answer.survivalTime && i < answer.loadout) {
+			answer.survivalTime = survivalTime
+			answer.loadout = i
+		}
+	}
+}
+
+func readParetoFront(filename string) (*paretoFileT, error) {
+	data, err := ioutil.ReadFile(filename)
+	if err != nil {
+		return nil, err
+	}
+	var front paretoFileT
+	if err = json.Unmarshal(data, &front); err != nil {
+		return nil, err
+	}
+	return &front, nil
+}
+
+// answerProfiles writes the best loadout of every profile as CSV to a file, so the answers don't get mixed with the
+// other output
+func answerProfiles(front *paretoFileT, profiles []profileT, filename string) error {
+	startTime := time.Now()
+	var index = newProfileIndex(front)
+	fmt.Println("Indexed", len(front.Loadouts), "loadouts of the", front.Ship, "in", time.Since(startTime))
+
+	startTime = time.Now()
+	var answers = make([]profileAnswerT, len(profiles))
+	for i := range profiles {
+		answers[i] = index.best(&profiles[i])
+	}
+	var dur = time.Since(startTime)
+	fmt.Println("Answered", len(profiles), "profiles in", dur)
+
+	file, err := os.Create(filename)
+	if err != nil {
+		return err
+	}
+	defer file.Close()
+	w := csv.NewWriter(file)
+	w.Write([]string{"profile", "survival_time", "generator", "boosters", "hit_points", "regen_rate",
+		"explosive_resistance", "kinetic_resistance", "thermal_resistance"})
+	for i, answer := range answers {
+		if answer.loadout < 0 {
+			w.Write([]string{profiles[i].Name, "", "", "", "", "", "", "", ""})
+			continue
+		}
+
+		var loadout = front.Loadouts[answer.loadout]
+		var survivalTime = "didn't die"
+		if answer.survivalTime > 0 {
+			survivalTime = fmt.Sprintf("%.2f", answer.survivalTime)
+		}
+		var generator = front.GeneratorVariants[loadout.Generator]
+		var boosters []string
+		for _, booster := range loadout.Boosters {
+			boosters = append(boosters, front.BoosterVariants[booster].Engineering+" - "+front.BoosterVariants[booster].Experimental)
+		}
+		w.Write([]string{
+			profiles[i].Name,
+			survivalTime,
+			generator.Type + " - " + generator.Engineering + " - " + generator.Experimental,
+			strings.Join(boosters, "; "),
+			fmt.Sprintf("%.1f", loadout.HitPoints),
+			fmt.Sprintf("%.2f", loadout.RegenRate),
+			fmt.Sprintf("%.4f", loadout.ExplosiveResistance),
+			fmt.Sprintf("%.4f", loadout.KineticResistance),
+			fmt.Sprintf("%.4f", loadout.ThermalResistance),
+		})
+	}
+	w.Flush()
+	if err = w.Error(); err != nil {
+		return err
+	}
+	if err = file.Close(); err != nil {
+		return err
+	}
+	fmt.Println("Wrote the answers to", filename)
+	return nil
+}
@@ -0,0 +1,92 @@
+package main
+
+// Dominance pruning of booster and generator variants before the loadouts are built.
+//
+// A variant is dominated when another one is at least as good on the shield strength and on every resistance
+// that takes damage in the current test (and for generators also on regen). Swapping every copy of a dominated
+// booster for the dominating one can't lower the hitpoints or raise any modifier product, and the diminishing
+// returns compensation is monotonic, so the actual DPS can't go up either. Each loadout with a dominated variant
+// is therefore matched by one without it that survives at least as long, and removing the dominated variants
+// doesn't change the best survival time. Loadouts that never lose their shield rank by hitpoints times the regen
+// left over, which the swap can't lower either. Variants with identical stats only keep the first one, which is
+// also the one that wins the tie on the loadout index, so the pruned test reports the same loadout as -noprune.
+
+// dominates tells if the stats in a are at least as good as in b, where larger is better for every entry.
+// Identical stats only count as dominating when a comes first, so one copy of duplicate variants is kept.
+func dominates(a, b []float64, aFirst bool) bool {
+	var better = false
+	for i := range a {
+		if a[i] < b[i] {
+			return false
+		}
+		if a[i] > b[i] {
+			better = true
+		}
+	}
+	return better || aFirst
+}
+
+// pruneDominated returns the indexes of the variants which aren't dominated by any other variant
+func pruneDominated(stats [][]float64) []int {
+	var kept []int
+	for i := range stats {
+		var dominated = false
+		for j := range stats {
+			if i != j && dominates(stats[j], stats[i], j < i) {
+				dominated = true
+				break
+			}
+		}
+		if !dominated {
+			kept = append(kept, i)
+		}
+	}
+	return kept
+}
+
+// resistanceAxes returns the modifiers of the damage types that are part of the test, negated so that larger is better
+func resistanceAxes(expModifier, kinModifier, thermModifier float64) []float64 {
+	var axes []float64
+	if !ignoresDamageType(config.explosiveDPS) {
+		axes = append(axes, -expModifier)
+	}
+	if !ignoresDamageType(config.kineticDPS) {
+		axes = append(axes, -kinModifier)
+	}
+	if !ignoresDamageType(config.thermalDPS) {
+		axes = append(axes, -thermModifier)
+	}
+	return axes
+}
+
+// removesDominated tells if dominated variants are removed before testing. A dominated variant can't be part of the
+// best loadout, but it can be part of the ones after it, so -top keeps them.
+func removesDominated() bool {
+	return config.pruneDominated && config.topCount <= 1
+}
+
+func pruneDominatedBoosters(boosterVariants []boosterT) []boosterT {
+	var stats = make([][]float64, len(boosterVariants))
+	for i, booster := range boosterVariants {
+		stats[i] = append([]float64{booster.shieldStrengthBonus}, resistanceAxes(booster.expResBonus, booster.kinResBonus, booster.thermResBonus)...)
+	}
+
+	var pruned []boosterT
+	for _, i := range pruneDominated(stats) {
+		pruned = append(pruned, boosterVariants[i])
+	}
+	return pruned
+}
+
+func pruneDominatedGenerators(generators []generatorT) []generatorT {
+	var stats = make([][]float64, len(generators))
+	for i, generator := range generators {
+		stats[i] = append([]float64{generator.shieldStrength, generator.regenRate}, resistanceAxes(generator.expRes, generator.kinRes, generator.thermRes)...)
+	}
+
+	var pruned []generatorT
+	for _, i := range pruneDominated(stats) {
+		pruned = append(pruned, generators[i])
+	}
+	return pruned
+}
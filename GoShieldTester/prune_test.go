@@ -0,0 +1,35 @@
+package main
+
+import "testing"
+
+// TestPruneKeepsResult checks that removing dominated variants reports the same loadout as -noprune, also when the
+// shield never goes down and better regen or resistances only change which loadout ranks first
+func TestPruneKeepsResult(t *testing.T) {
+	var setups = []struct {
+		name                 string
+		kineticDPS, thermDPS float64
+	}{
+		{"default", 50, 50},
+		{"no damage", 0, 0},
+		{"little damage", 1, 0},
+	}
+	for _, setup := range setups {
+		t.Run(setup.name, func(t *testing.T) {
+			var generators, boosterVariants = setupTop(t, 3, 1, false)
+			config.kineticDPS, config.thermalDPS = setup.kineticDPS, setup.thermDPS
+			var want, _ = testGenerators(generators, boosterVariants, newBoosterLoadouts(boosterVariants, config.shieldBoosterCount))
+
+			var prunedGenerators, prunedBoosters = pruneDominatedGenerators(generators), pruneDominatedBoosters(boosterVariants)
+			var got, _ = testGenerators(prunedGenerators, prunedBoosters, newBoosterLoadouts(prunedBoosters, config.shieldBoosterCount))
+
+			if len(got) != 1 || len(want) != 1 {
+				t.Fatalf("got %d loadouts, want 1 from each test", len(got))
+			}
+			var gotBoosters, wantBoosters = boosterSummary(got[0].shieldBoosterLoadout, prunedBoosters), boosterSummary(want[0].shieldBoosterLoadout, boosterVariants)
+			if got[0].survivalTime != want[0].survivalTime || got[0].shieldGenerator.ID != want[0].shieldGenerator.ID || gotBoosters != wantBoosters {
+				t.Fatalf("got %g s generator %d %s, want %g s generator %d %s", got[0].survivalTime, got[0].shieldGenerator.ID, gotBoosters,
+					want[0].survivalTime, want[0].shieldGenerator.ID, wantBoosters)
+			}
+		})
+	}
+}
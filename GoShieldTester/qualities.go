@@ -0,0 +1,121 @@
+package main
+
+import (
+	"fmt"
+	"strconv"
+	"strings"
+	"time"
+)
+
+// The variant files hold modules at the best roll of their blueprint. A sweep tests the same variants at lower
+// qualities, where a quality of 0 is an unengineered module and 1 is the module of the file. The experimental effect
+// is part of the numbers of the file, so it is scaled along with the blueprint. In between, every stat is interpolated
+// linearly. All modules of a loadout get the same quality.
+//
+// Scaling keeps the order of the variants' stats, so variants that are dominated at the best roll are dominated at
+// every quality and are only removed once. The booster loadouts are enumerated in the same order at every quality, so
+// the same index is the same loadout throughout the sweep.
+
+// stats of unengineered modules
+const (
+	baseBoosterShieldStrengthBonus = 0.2
+	baseGeneratorExpRes            = 0.5
+	baseGeneratorKinRes            = 0.4
+	baseGeneratorThermRes          = -0.2
+)
+
+// parseQualities returns the qualities of a comma separated list, each between 0 and 1
+func parseQualities(list string) ([]float64, error) {
+	var qualities []float64
+	for _, field := range strings.Split(list, ",") {
+		quality, err := strconv.ParseFloat(strings.TrimSpace(field), 64)
+		if err != nil {
+			return nil, fmt.Errorf("invalid quality %q", field)
+		}
+		if quality < 0 || quality > 1 {
+			return nil, fmt.Errorf("quality %v is not between 0 and 1", quality)
+		}
+		qualities = append(qualities, quality)
+	}
+	return qualities, nil
+}
+
+func interpolate(base, full, quality float64) float64 {
+	return base + quality*(full-base)
+}
+
+// boostersAtQuality returns the booster variants rolled at the given quality
+func boostersAtQuality(boosterVariants []boosterT, quality float64) []boosterT {
+	var boosters = make([]boosterT, len(boosterVariants))
+	for i, booster := range boosterVariants {
+		booster.shieldStrengthBonus = interpolate(baseBoosterShieldStrengthBonus, booster.shieldStrengthBonus, quality)
+		// the variants hold 1 - resistance bonus, unengineered boosters have no resistance bonus
+		booster.expResBonus = 1.0 - interpolate(0, 1.0-booster.expResBonus, quality)
+		booster.kinResBonus = 1.0 - interpolate(0, 1.0-booster.kinResBonus, quality)
+		booster.thermResBonus = 1.0 - interpolate(0, 1.0-booster.thermResBonus, quality)
+		boosters[i] = booster
+	}
+	return boosters
+}
+
+// generatorsAtQuality returns the generator variants rolled at the given quality
+func generatorsAtQuality(generators []generatorT, quality float64) []generatorT {
+	var regenBonus = make(map[int]float64, len(gameData.Generators))
+	for _, record := range gameData.Generators {
+		regenBonus[record.ID] = record.RegenBonus
+	}
+
+	var scaled = make([]generatorT, len(generators))
+	for i, generator := range generators {
+		var bonus = regenBonus[generator.ID]
+		generator.regenRate = generator.regenRate / (1 + bonus) * (1 + quality*bonus)
+		// the variants hold 1 - resistance
+		generator.expRes = 1.0 - interpolate(baseGeneratorExpRes, 1.0-generator.expRes, quality)
+		generator.kinRes = 1.0 - interpolate(baseGeneratorKinRes, 1.0-generator.kinRes, quality)
+		generator.thermRes = 1.0 - interpolate(baseGeneratorThermRes, 1.0-generator.thermRes, quality)
+		scaled[i] = generator
+	}
+	return scaled
+}
+
+// testQualities finds the best loadout at every quality and shows how it changes
+func testQualities(qualities []float64, generators []generatorT, boosterVariants []boosterT) {
+	startTime := time.Now()
+	var results = make([]*resultT, 0, len(qualities)) // nil if no loadout was found
+	var tested int
+	for _, quality := range qualities {
+		if isCancelled() {
+			break
+		}
+		var stepStartTime = time.Now()
+		var qualityGenerators = generatorsAtQuality(generators, quality)
+		var qualityBoosters = boostersAtQuality(boosterVariants, quality)
+		var boosterLoadouts = newBoosterLoadouts(qualityBoosters, config.shieldBoosterCount)
+		metrics.phase("Booster loadouts", stepStartTime)
+
+		var qualityResults, qualityTested = testGenerators(qualityGenerators, qualityBoosters, boosterLoadouts)
+		tested += qualityTested
+		if len(qualityResults) == 0 {
+			results = append(results, nil)
+			continue
+		}
+		results = append(results, &qualityResults[0])
+	}
+	var loadouts = countBoosterLoadouts(len(boosterVariants), config.shieldBoosterCount) * len(generators)
+	fmt.Println("Tested", tested, "of", loadouts*len(qualities), "loadouts at", len(qualities), "qualities in", time.Since(startTime))
+	fmt.Println()
+	startTime = time.Now()
+
+	var steps = make([]string, len(qualities))
+	for i, quality := range qualities {
+		steps[i] = fmt.Sprintf("%.2f", quality)
+	}
+	// the names of the variants are the same at every quality
+	showSweepResults("Quality", steps, results, boosterVariants)
+
+	if isCancelled() {
+		fmt.Println()
+		fmt.Println("Cancelled, the remaining qualities were not tested")
+	}
+	metrics.phase("Show results", startTime)
+}
@@ -1,10 +1,6 @@
 package main
 
 import (
-	"encoding/csv"
-	"io"
-	"log"
-	"os"
 	"strconv"
 )
 
@@ -14,28 +10,29 @@ type shipT struct {
 	hullMass, baseShieldStrength float64
 }
 
-func loadShipStats(name string) (float64, float64) {
-
-	var err error
-	shipfile, err := os.Open(config.shipFile)
+func parseShips(filename string) (map[string]shipRecordT, error) {
+	var ships = make(map[string]shipRecordT)
+	records, err := readCSV(filename)
 	if err != nil {
-		log.Fatal(err)
+		return nil, err
 	}
-
-	r := csv.NewReader(shipfile)
-	record, err := r.Read()
-
-	for {
-
-		record, err = r.Read()
-		if err == io.EOF {
-			break
-		}
-		if record[1] == name {
-			baseShieldStrength, _ := strconv.ParseFloat(record[3], 64)
-			hullMass, _ := strconv.ParseFloat(record[2], 64)
-			return baseShieldStrength, hullMass
+	for _, record := range records {
+		if _, ok := ships[record[1]]; ok {
+			continue
 		}
+		var ship shipRecordT
+		ship.BaseShieldStrength, _ = strconv.ParseFloat(record[3], 64)
+		ship.HullMass, _ = strconv.ParseFloat(record[2], 64)
+		ship.MaxShieldClass, _ = strconv.ParseFloat(record[4], 64)
+		ship.BoosterSlots, _ = strconv.Atoi(record[5])
+		ships[record[1]] = ship
+	}
+	return ships, nil
+}
+
+func loadShipStats(name string) (float64, float64) {
+	if ship, ok := gameData.Ships[name]; ok {
+		return ship.BaseShieldStrength, ship.HullMass
 	}
 	return 0, 0
 }
@@ -0,0 +1,34 @@
+package main
+
+import (
+	"fmt"
+	"os"
+	"reflect"
+	"text/tabwriter"
+)
+
+// showSweepResults shows the best loadout of each step of a sweep and marks the steps where it changed. A nil result
+// means that no loadout was found for that step.
+func showSweepResults(parameter string, steps []string, results []*resultT, boosterVariants []boosterT) {
+	w := tabwriter.NewWriter(os.Stdout, 0, 0, 2, ' ', 0)
+	fmt.Fprintf(w, "%s\tSurvival Time\tLoadout\tShield Generator\tShield Boosters\tHitpoints\tRegen\t\n", parameter)
+	for i, result := range results {
+		if result == nil {
+			fmt.Fprintf(w, "%s\t-\t\t\t\t\t\t\n", steps[i])
+			continue
+		}
+		var change = "same"
+		if i == 0 || results[i-1] == nil {
+			change = ""
+		} else if result.shieldGenerator.ID != results[i-1].shieldGenerator.ID ||
+			!reflect.DeepEqual(result.shieldBoosterLoadout, results[i-1].shieldBoosterLoadout) {
+			change = "changed"
+		}
+		var generator = result.shieldGenerator
+		fmt.Fprintf(w, "%s\t%s\t%s\t%s / %s / %s\t%s\t%.1f Mj\t%.2f Mj/s\t\n", steps[i], formatSurvivalTime(result.survivalTime),
+			change, generator.name, generator.engineering, generator.experimental,
+			boosterSummary(result.shieldBoosterLoadout, boosterVariants),
+			result.loadOutStats.hitPoints-config.scbHitPoint, result.loadOutStats.regenRate)
+	}
+	w.Flush()
+}
@@ -1,77 +1,337 @@
 package main
 
 import (
+	"fmt"
+	"math"
+	"strings"
 	"sync"
+	"sync/atomic"
+	"time"
 )
 
-func testCase(ch chan resultT, wg *sync.WaitGroup, shieldGenerator generatorT, boosterVariants []boosterT, shieldBoosterLoadoutList [][]int) {
-	bestTestCase := resultT{
-		survivalTime: 0.0,
+// Workers take chunks of booster loadouts from a shared position until they are all tested with every generator. The
+// size of a worker's next chunk follows its measured throughput, so a chunk takes about chunkDuration, and shrinks
+// towards the end of the test so that all workers run out of loadouts at about the same time.
+const (
+	minChunkSize  = 1 << 10
+	chunkDuration = 20 * time.Millisecond
+)
+
+type rangeResultT struct {
+	loadout      int // index of the best loadout, -1 if none
+	survivalTime float64
+}
+
+// testRunT holds the data of one test. Its generators and booster variants are only read by the workers, so they are
+// shared by all of them and jobs only carry indexes into them. Loadouts are numbered generator by generator, so the
+// loadout with index i is booster loadout i % n of generator i / n, where n is the number of booster loadouts.
+type testRunT struct {
+	generatorStats  []generatorStatsT
+	boosterLoadouts *boosterLoadoutsT
+	total           int64  // number of loadouts to test
+	next            int64  // first booster loadout that hasn't been taken by a worker yet
+	tested          int64  // number of loadouts tested or skipped so far
+	skipped         int64  // number of loadouts skipped because their bound couldn't beat the best survival time
+	bestBits        uint64 // bits of the best positive survival time any worker has found so far
+	neverDies       int32  // set once any worker has found a loadout that doesn't go down
+	searchOrder     []int  // generators in the order -bnb searches them
+	results         []rangeResultT
+	tops            []*topLoadoutsT   // best loadouts of each worker with -top
+	leaders         chan rangeResultT // loadouts that made it into a worker's top, for showLeaders
+	workerMetrics   []workerMetricsT
+	started         time.Time
+	wg              sync.WaitGroup
+}
+
+func newTestRun(generators []generatorT, boosterLoadouts *boosterLoadoutsT) *testRunT {
+	run := &testRunT{
+		generatorStats:  make([]generatorStatsT, len(generators)),
+		boosterLoadouts: boosterLoadouts,
+		total:           int64(len(generators) * boosterLoadouts.size()),
+	}
+	for generator := range generators {
+		run.generatorStats[generator] = generators[generator].generatorStatsT
+	}
+	return run
+}
+
+// cancelled is set to stop the running test, workers check it between blocks of boundBlockSize loadouts
+var cancelled int32
+
+func cancel() {
+	atomic.StoreInt32(&cancelled, 1)
+}
+
+func isCancelled() bool {
+	return atomic.LoadInt32(&cancelled) != 0
+}
+
+// publish shares a worker's best survival time with the other workers
+func (run *testRunT) publish(survivalTime float64) {
+	if survivalTime < 0 {
+		atomic.StoreInt32(&run.neverDies, 1)
+		return
+	}
+	for {
+		var old = atomic.LoadUint64(&run.bestBits)
+		if survivalTime <= math.Float64frombits(old) || atomic.CompareAndSwapUint64(&run.bestBits, old, math.Float64bits(survivalTime)) {
+			return
+		}
+	}
+}
+
+// canImprove tells if a range of loadouts with the given bound might hold a loadout that is at least as good as the
+// best one found by any worker. Ranges that tie are kept, so the lowest index still wins and the result doesn't
+// depend on the order the workers found their loadouts in.
+func (run *testRunT) canImprove(shieldGenerator *generatorStatsT, bound *boosterBoundT) bool {
+	survivalTime, actualDPS := getSurvivalTime(*shieldGenerator, bound.maxHitPointBonus, bound.minExpModifier,
+		bound.minKinModifier, bound.minThermModifier)
+	if actualDPS <= 0 {
+		return true
+	}
+	if atomic.LoadInt32(&run.neverDies) != 0 {
+		return false
+	}
+	return survivalTime >= math.Float64frombits(atomic.LoadUint64(&run.bestBits))
+}
+
+// progress returns the fraction of the loadouts that has been tested
+func (run *testRunT) progress() float64 {
+	if run.total == 0 {
+		return 1
+	}
+	return float64(atomic.LoadInt64(&run.tested)) / float64(run.total)
+}
+
+func (run *testRunT) nextChunkSize(tested int64, elapsed time.Duration) int64 {
+	var chunkSize = int64(minChunkSize)
+	if elapsed > 0 {
+		chunkSize = int64(float64(tested) * float64(chunkDuration) / float64(elapsed))
 	}
 
-	var result resultT
+	var remaining = int64(run.boosterLoadouts.size()) - atomic.LoadInt64(&run.next)
+	if limit := remaining / int64(2*len(run.results)); chunkSize > limit {
+		chunkSize = limit
+	}
+	if chunkSize < minChunkSize {
+		chunkSize = minChunkSize
+	}
+	return chunkSize
+}
 
-	for _, shieldBoosterLoadout := range shieldBoosterLoadoutList {
-		// Calculate the resistance, regen-rate and hitpoints of the current loadout
-		var loadoutStats = getLoadoutStats(shieldGenerator, shieldBoosterLoadout, boosterVariants)
+// test is run by each worker and keeps taking chunks of booster loadouts until there are none left. A chunk is tested
+// block by block, each block is enumerated once and then tested with every generator that its bound doesn't rule out.
+func (run *testRunT) test(worker int) {
+	defer run.wg.Done()
 
-		var actualDPS float64 = config.damageEffectiveness*
-			(config.explosiveDPS*loadoutStats.explosiveResistance+
-				config.kineticDPS*loadoutStats.kineticResistance+
-				config.thermalDPS*loadoutStats.thermalResistance+
-				config.absoluteDPS) - loadoutStats.regenRate*(1-config.damageEffectiveness)
+	var m = &run.workerMetrics[worker]
+	m.wait = time.Since(run.started)
+	if config.branchAndBound {
+		run.search(worker)
+		return
+	}
 
-		var survivalTime float64 = (loadoutStats.hitPoints + config.scbHitPoint) / actualDPS
+	best := rangeResultT{loadout: -1}
+	var top *topLoadoutsT
+	if config.topCount > 1 {
+		top = newTopLoadouts(config.topCount)
+	}
+	var n = int64(run.boosterLoadouts.size())
+	var generators = int64(len(run.generatorStats))
+	var block = newBoosterBlock(run.boosterLoadouts)
+	var chunkSize = int64(minChunkSize)
 
-		result = resultT{
-			shieldGenerator:      shieldGenerator,
-			shieldBoosterLoadout: shieldBoosterLoadout,
-			loadOutStats:         loadoutStats,
-			survivalTime:         survivalTime,
+	for {
+		var first = atomic.AddInt64(&run.next, chunkSize) - chunkSize
+		if first >= n {
+			break
+		}
+		var last = first + chunkSize
+		if last > n {
+			last = n
 		}
 
-		if actualDPS > 0 && bestTestCase.survivalTime >= 0 {
-			if result.survivalTime > bestTestCase.survivalTime {
-				bestTestCase = result
-			}
-		} else if actualDPS < 0 {
-			if result.survivalTime < bestTestCase.survivalTime {
-				bestTestCase = result
+		startTime := time.Now()
+		var skipped int64
+		var loadout = run.boosterLoadouts.loadout(int(first))
+		var blockLoadout = make([]int, len(loadout))
+		for blockFirst := first; blockFirst < last && !isCancelled(); {
+			copy(blockLoadout, loadout)
+			var end, bound = run.boosterLoadouts.nextBlock(loadout, int(blockFirst), int(last))
+			var blockLast = int64(end)
+
+			for generator := int64(0); generator < generators; generator++ {
+				var shieldGenerator = &run.generatorStats[generator]
+				if !run.canImprove(shieldGenerator, &bound) {
+					skipped += blockLast - blockFirst
+					continue
+				}
+
+				block.load(int(blockFirst), int(blockLast), blockLoadout)
+				var offset = generator * n
+				if top != nil {
+					if testLoadoutsTop(shieldGenerator, block, offset, top) {
+						run.sendLeaders(top, offset+blockFirst, offset+blockLast)
+						if top.full() {
+							run.publish(top.worst().survivalTime)
+						}
+					}
+				} else {
+					result := testLoadouts(shieldGenerator, block)
+					if result.loadout < 0 {
+						continue
+					}
+					// a range's survival time has the sign of its actual DPS, on equal survival times the lowest loadout
+					// index wins as blocks aren't tested in the order of the loadout indexes
+					result.loadout += int(offset)
+					if isBetterSurvivalTime(result.survivalTime, result.survivalTime, best.survivalTime) ||
+						(result.survivalTime == best.survivalTime && result.loadout < best.loadout) {
+						best = result
+						run.publish(best.survivalTime)
+					}
+				}
 			}
+			blockFirst = blockLast
+		}
+
+		if isCancelled() {
+			break
 		}
+		var loadouts = (last - first) * generators
+		atomic.AddInt64(&run.skipped, skipped)
+		atomic.AddInt64(&run.tested, loadouts)
+		var elapsed = time.Since(startTime)
+		m.busy += elapsed
+		m.loadouts += loadouts
+		m.skipped += skipped
+		m.chunks++
+		chunkSize = run.nextChunkSize(last-first, elapsed)
 	}
 
-	ch <- bestTestCase
-	wg.Done()
+	run.results[worker] = best
+	run.tops[worker] = top
 }
 
-func testGenerators(generators []generatorT, boosterVariants []boosterT, boosterList [][]int) resultT {
-	bestResult := resultT{survivalTime: 0.0}
+// testLoadouts returns the best loadout of a block
+func testLoadouts(shieldGenerator *generatorStatsT, block *boosterBlockT) rangeResultT {
+	best := rangeResultT{
+		loadout:      -1,
+		survivalTime: 0.0,
+	}
 
-	ch := make(chan resultT, len(generators))
-	wg := sync.WaitGroup{}
+	for i := range block.hitPointBonus {
+		// Calculate the resistance, regen-rate and hitpoints of the current loadout from the precomputed booster stats
+		survivalTime, actualDPS := getSurvivalTime(*shieldGenerator, block.hitPointBonus[i],
+			block.expModifier[i], block.kinModifier[i], block.thermModifier[i])
 
-	for _, generator := range generators {
-		wg.Add(1)
-		go testCase(ch, &wg, generator, boosterVariants, boosterList)
+		if isBetterSurvivalTime(survivalTime, actualDPS, best.survivalTime) {
+			best.survivalTime = survivalTime
+			best.loadout = block.first + i
+		}
 	}
 
-	wg.Wait()
-	close(ch)
+	return best
+}
 
-	for result := range ch {
-		if bestResult.survivalTime < 0 {
-			if result.survivalTime < bestResult.survivalTime {
-				bestResult = result
+func showProgress(run *testRunT, done chan struct{}) {
+	const width = 45
+	ticker := time.NewTicker(100 * time.Millisecond)
+	defer ticker.Stop()
+
+	for {
+		var progress = run.progress()
+		fmt.Printf("\rTests [%-*s] %5.1f%%", width, strings.Repeat("#", int(progress*width)), progress*100)
+		select {
+		case <-done:
+			progress = run.progress()
+			fmt.Printf("\rTests [%-*s] %5.1f%%\n", width, strings.Repeat("#", int(progress*width)), progress*100)
+			return
+		case <-ticker.C:
+		}
+	}
+}
+
+// testGenerators tests every loadout that might beat the best one found so far and returns the best loadout, or with
+// -top the best ones, best first. If the test is cancelled, the best loadouts found until then are returned.
+func testGenerators(generators []generatorT, boosterVariants []boosterT, boosterLoadouts *boosterLoadoutsT) ([]resultT, int) {
+	startTime := time.Now()
+
+	var run = newTestRun(generators, boosterLoadouts)
+	if config.branchAndBound {
+		run.setSearchOrder()
+	}
+	var leadersDone chan struct{}
+	if config.topCount > 1 {
+		run.leaders = make(chan rangeResultT, 1024)
+		leadersDone = make(chan struct{})
+		go showLeaders(run, generators, boosterVariants, leadersDone)
+	}
+	if config.showProgress {
+		done := make(chan struct{})
+		stopped := make(chan struct{})
+		go func() {
+			showProgress(run, done)
+			close(stopped)
+		}()
+		pool.run(run)
+		close(done)
+		<-stopped
+	} else {
+		pool.run(run)
+	}
+	if run.leaders != nil {
+		close(run.leaders)
+		<-leadersDone
+	}
+	startTime = metrics.phase("Test loadouts", startTime)
+	metrics.addTestRun(run)
+
+	var best []rangeResultT
+	if config.topCount > 1 {
+		var top = newTopLoadouts(config.topCount)
+		for _, workerTop := range run.tops {
+			if workerTop != nil {
+				for _, entry := range workerTop.entries {
+					top.add(entry)
+				}
 			}
-		} else {
-			if result.survivalTime < 0 {
-				bestResult = result
-			} else if result.survivalTime > bestResult.survivalTime {
+		}
+		best = top.sorted()
+	} else {
+		// on equal survival times the lowest loadout index wins, so the result doesn't depend on how the work was split
+		bestResult := rangeResultT{loadout: -1}
+		for _, result := range run.results {
+			if result.loadout < 0 {
+				continue
+			}
+			if isBetterSurvivalTime(result.survivalTime, result.survivalTime, bestResult.survivalTime) ||
+				(result.survivalTime == bestResult.survivalTime && result.loadout < bestResult.loadout) {
 				bestResult = result
 			}
 		}
+		if bestResult.loadout >= 0 {
+			best = append(best, bestResult)
+		}
+	}
+
+	var results []resultT
+	for _, entry := range best {
+		results = append(results, newResult(entry, generators, boosterVariants, boosterLoadouts))
 	}
 
-	return bestResult
+	metrics.phase("Merge results", startTime)
+	return results, int(atomic.LoadInt64(&run.tested) - atomic.LoadInt64(&run.skipped))
+}
+
+// newResult looks up the generator and boosters of a loadout index of a test run
+func newResult(entry rangeResultT, generators []generatorT, boosterVariants []boosterT, boosterLoadouts *boosterLoadoutsT) resultT {
+	var n = boosterLoadouts.size()
+	var shieldGenerator = generators[entry.loadout/n]
+	var shieldBoosterLoadout = boosterLoadouts.loadout(entry.loadout % n)
+	return resultT{
+		shieldGenerator:      shieldGenerator,
+		shieldBoosterLoadout: shieldBoosterLoadout,
+		loadOutStats:         getLoadoutStats(shieldGenerator, shieldBoosterLoadout, boosterVariants),
+		survivalTime:         entry.survivalTime,
+	}
 }
@@ -0,0 +1,164 @@
+package main
+
+import (
+	"container/heap"
+	"fmt"
+	"sort"
+	"time"
+)
+
+// With -top every worker keeps the best loadouts it has found in a heap of fixed size, so memory doesn't grow with
+// the number of loadouts. The worst of them is on top of the heap and is what a new loadout has to beat. A worker's
+// worst kept loadout is a lower bound of the worst loadout of the overall top, so it is shared like the best survival
+// time of a normal test and blocks that can't beat it are skipped. The heaps of the workers are merged at the end.
+
+// leaderInterval is how often the best loadouts found so far are shown while testing
+const leaderInterval = 250 * time.Millisecond
+
+// rankedBefore orders loadouts by survival time like isBetterSurvivalTime, on equal survival times the lower index
+// comes first so the top doesn't depend on how the work was split
+func rankedBefore(a, b rangeResultT) bool {
+	if a.survivalTime == b.survivalTime {
+		return a.loadout < b.loadout
+	}
+	if a.survivalTime < 0 || b.survivalTime < 0 {
+		return a.survivalTime < b.survivalTime
+	}
+	return a.survivalTime > b.survivalTime
+}
+
+// topLoadoutsT holds up to size loadouts, the worst one first
+type topLoadoutsT struct {
+	size    int
+	entries []rangeResultT
+}
+
+func newTopLoadouts(size int) *topLoadoutsT {
+	return &topLoadoutsT{size: size, entries: make([]rangeResultT, 0, size)}
+}
+
+func (t *topLoadoutsT) Len() int           { return len(t.entries) }
+func (t *topLoadoutsT) Less(i, j int) bool { return rankedBefore(t.entries[j], t.entries[i]) }
+func (t *topLoadoutsT) Swap(i, j int)      { t.entries[i], t.entries[j] = t.entries[j], t.entries[i] }
+func (t *topLoadoutsT) Push(x interface{}) { t.entries = append(t.entries, x.(rangeResultT)) }
+func (t *topLoadoutsT) Pop() interface{} {
+	var last = t.entries[len(t.entries)-1]
+	t.entries = t.entries[:len(t.entries)-1]
+	return last
+}
+
+func (t *topLoadoutsT) full() bool {
+	return len(t.entries) == t.size
+}
+
+// worst returns the survival time a loadout has to beat to be kept, only valid if the top is full
+func (t *topLoadoutsT) worst() rangeResultT {
+	return t.entries[0]
+}
+
+// add keeps the loadout if it is among the best ones and tells if it was kept
+func (t *topLoadoutsT) add(result rangeResultT) bool {
+	if !t.full() {
+		heap.Push(t, result)
+		return true
+	}
+	if !rankedBefore(result, t.entries[0]) {
+		return false
+	}
+	t.entries[0] = result
+	heap.Fix(t, 0)
+	return true
+}
+
+// sorted returns the loadouts, best first
+func (t *topLoadoutsT) sorted() []rangeResultT {
+	var entries = append([]rangeResultT(nil), t.entries...)
+	sort.Slice(entries, func(i, j int) bool { return rankedBefore(entries[i], entries[j]) })
+	return entries
+}
+
+// testLoadoutsTop adds the loadouts of a block that are among the best ones of the worker to its top. offset is the
+// index of the generator's first loadout.
+func testLoadoutsTop(shieldGenerator *generatorStatsT, block *boosterBlockT, offset int64, top *topLoadoutsT) bool {
+	var added = false
+	for i := range block.hitPointBonus {
+		survivalTime, actualDPS := getSurvivalTime(*shieldGenerator, block.hitPointBonus[i],
+			block.expModifier[i], block.kinModifier[i], block.thermModifier[i])
+		if actualDPS == 0 {
+			continue
+		}
+		// cheap check against the worst kept loadout before going through the heap
+		if top.full() && survivalTime != top.worst().survivalTime && !isBetterSurvivalTime(survivalTime, actualDPS, top.worst().survivalTime) {
+			continue
+		}
+		if top.add(rangeResultT{loadout: int(offset) + block.first + i, survivalTime: survivalTime}) {
+			added = true
+		}
+	}
+	return added
+}
+
+// sendLeaders sends the kept loadouts with an index in [first, last) to the reporter of the test run
+func (run *testRunT) sendLeaders(top *topLoadoutsT, first, last int64) {
+	for _, entry := range top.entries {
+		if int64(entry.loadout) >= first && int64(entry.loadout) < last {
+			run.leaders <- entry
+		}
+	}
+}
+
+// showLeaders merges the loadouts sent by the workers and shows the best ones whenever they changed, until the
+// channel is closed
+func showLeaders(run *testRunT, generators []generatorT, boosterVariants []boosterT, done chan struct{}) {
+	defer close(done)
+	var top = newTopLoadouts(config.topCount)
+	var changed = false
+	ticker := time.NewTicker(leaderInterval)
+	defer ticker.Stop()
+	startTime := time.Now()
+
+	for {
+		select {
+		case entry, ok := <-run.leaders:
+			if !ok {
+				return
+			}
+			if top.add(entry) {
+				changed = true
+			}
+		case <-ticker.C:
+			if !changed {
+				continue
+			}
+			changed = false
+			fmt.Printf("Leaders after %v:\n", time.Since(startTime).Round(time.Millisecond))
+			for i, entry := range top.sorted() {
+				var result = newResult(entry, generators, boosterVariants, run.boosterLoadouts)
+				fmt.Printf("%3d. %-12s %s / %s / %s - %s\n", i+1, formatSurvivalTime(result.survivalTime), result.shieldGenerator.name,
+					result.shieldGenerator.engineering, result.shieldGenerator.experimental,
+					boosterSummary(result.shieldBoosterLoadout, boosterVariants))
+			}
+		}
+	}
+}
+
+func formatSurvivalTime(survivalTime float64) string {
+	if survivalTime < 0 {
+		return "Didn't die"
+	}
+	return fmt.Sprintf("%.2f s", survivalTime)
+}
+
+func showTopResults(results []resultT, boosterVariants []boosterT) {
+	fmt.Println()
+	fmt.Printf("---- TOP %d LOADOUTS ----\n", len(results))
+	fmt.Println()
+
+	for i, result := range results {
+		var generator = result.shieldGenerator
+		fmt.Printf("%3d. %-12s %s / %s / %s - %s (%.1f Mj, %.2f Mj/s)\n", i+1, formatSurvivalTime(result.survivalTime),
+			generator.name, generator.engineering, generator.experimental,
+			boosterSummary(result.shieldBoosterLoadout, boosterVariants),
+			result.loadOutStats.hitPoints-config.scbHitPoint, result.loadOutStats.regenRate)
+	}
+}
@@ -0,0 +1,109 @@
+package main
+
+import (
+	"sort"
+	"testing"
+)
+
+// setupTop loads the variants of the default ship with the given booster count, -top and damage profile
+func setupTop(t *testing.T, boosters, top int, thargoid bool) ([]generatorT, []boosterT) {
+	config = loadConfig()
+	config.shieldBoosterCount = boosters
+	config.topCount = top
+	config.damageEffectiveness = config.damageEffectiveness / 100
+	if thargoid {
+		config.explosiveDPS, config.kineticDPS, config.thermalDPS, config.absoluteDPS = 0, 0, 0, 200
+		config.damageEffectiveness = 0.10
+	}
+	if gameData == nil {
+		var err error
+		if gameData, err = loadGameData(); err != nil {
+			t.Fatal(err)
+		}
+	}
+	if pool == nil {
+		pool = newWorkerPool(4)
+	}
+	var baseShieldStrength, hullMass = loadShipStats(config.shipName)
+	return loadGenerators(baseShieldStrength, hullMass), loadboosterVariants(&config)
+}
+
+// rankAll tests every loadout of all variants and returns them best first
+func rankAll(generators []generatorT, boosterLoadouts *boosterLoadoutsT) []rangeResultT {
+	var n = boosterLoadouts.size()
+	var ranked []rangeResultT
+	for g := range generators {
+		for i := 0; i < n; i++ {
+			var sum = boosterSumT{hitPointBonus: 1.0, expModifier: 1.0, kinModifier: 1.0, thermModifier: 1.0}
+			for _, booster := range boosterLoadouts.loadout(i) {
+				sum = sum.add(boosterLoadouts.boosterVariants[booster-1])
+			}
+			survivalTime, actualDPS := getSurvivalTime(generators[g].generatorStatsT, sum.hitPointBonus, applyDiminishingReturns(sum.expModifier),
+				applyDiminishingReturns(sum.kinModifier), applyDiminishingReturns(sum.thermModifier))
+			if actualDPS == 0 {
+				continue
+			}
+			ranked = append(ranked, rangeResultT{loadout: g*n + i, survivalTime: survivalTime})
+		}
+	}
+	sort.Slice(ranked, func(i, j int) bool { return rankedBefore(ranked[i], ranked[j]) })
+	return ranked
+}
+
+// TestTopMatchesUnpruned checks -top against a ranking of every loadout of all variants, dominated or not
+func TestTopMatchesUnpruned(t *testing.T) {
+	var setups = []struct {
+		name     string
+		boosters int
+		top      int
+		thargoid bool
+	}{
+		{"default", 3, 200, false},
+		{"thargoid", 3, 20, true},
+		{"more boosters", 5, 50, false},
+	}
+	for _, setup := range setups {
+		t.Run(setup.name, func(t *testing.T) {
+			var generators, boosterVariants = setupTop(t, setup.boosters, setup.top, setup.thargoid)
+			var allGenerators, allBoosters = generators, boosterVariants
+			var allLoadouts = newBoosterLoadouts(allBoosters, config.shieldBoosterCount)
+			var want = rankAll(allGenerators, allLoadouts)[:setup.top]
+
+			if removesDominated() {
+				generators = pruneDominatedGenerators(generators)
+				boosterVariants = pruneDominatedBoosters(boosterVariants)
+			}
+			var results, _ = testGenerators(generators, boosterVariants, newBoosterLoadouts(boosterVariants, config.shieldBoosterCount))
+			if len(results) != len(want) {
+				t.Fatalf("got %d loadouts, want %d", len(results), len(want))
+			}
+			for i, result := range results {
+				var expected = newResult(want[i], allGenerators, allBoosters, allLoadouts)
+				var got, wanted = boosterSummary(result.shieldBoosterLoadout, boosterVariants), boosterSummary(expected.shieldBoosterLoadout, allBoosters)
+				if result.survivalTime != expected.survivalTime || result.shieldGenerator.ID != expected.shieldGenerator.ID || got != wanted {
+					t.Fatalf("rank %d: got %.4f s %s, want %.4f s %s", i+1, result.survivalTime, got, expected.survivalTime, wanted)
+				}
+			}
+		})
+	}
+}
+
+func TestTopRejectsOtherModes(t *testing.T) {
+	config = loadConfig()
+	config.topCount = 5
+	config.branchAndBound = true
+	if checkFlags() == nil {
+		t.Error("-top with -bnb was accepted")
+	}
+	config = loadConfig()
+	config.topCount = 5
+	config.fleet = "all"
+	if checkFlags() == nil {
+		t.Error("-top with -fleet was accepted")
+	}
+	config = loadConfig()
+	config.topCount = 5
+	if checkFlags() != nil {
+		t.Error("-top alone was rejected")
+	}
+}
@@ -0,0 +1,247 @@
+"""
+asyncio interface to the shield tester for services that run many tests at the same time.
+
+AsyncShieldTester runs tests on one process pool that is shared by all of them. Every worker process loads data.json
+once and tests one loadout list at a time on a single core, so running jobs don't compete for cores. submit returns a
+ComputeJob right away: await it for the TestResult, iterate over it with async for to get its events while it runs and
+cancel it, or the task awaiting it, to stop the test. Events of all workers come back through one queue and one reader
+thread, there is no thread or polling loop per job.
+
+Events are (kind, value) tuples:
+  EVENT_PROGRESS  fraction of the test that is done, from 0 to 1
+  EVENT_MESSAGE   text the engine writes while testing, like the output of the user interface
+There is no leader event with the best loadout so far: the engine calls back with CALLBACK_STEP and CALLBACK_CANCELLED
+only and returns the best loadout once the test is done, so the callback never sees a loadout it could send. The Go
+port streams the leaders while testing with -top.
+
+Example:
+    async with AsyncShieldTester(cores=4) as tester:
+        job = tester.submit(test_case)
+        async for kind, value in job:
+            if kind == AsyncShieldTester.EVENT_PROGRESS:
+                print(f"{value:.0%}")
+        test_result = await job
+        results = await asyncio.gather(*[tester.compute(test_case) for test_case in test_cases])
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import shield_tester as st
+from result_cache import ResultCache
+
+DATA_FILE = os.path.join(os.getcwd(), "data.json")
+
+# set by _init_worker in every worker process
+_worker_shield_tester = None  # type: Optional[st.ShieldTester]
+_worker_events = None  # type: Optional[multiprocessing.Queue]
+
+
+def _init_worker(data_file: str, events: multiprocessing.Queue):
+    global _worker_shield_tester, _worker_events
+    _worker_shield_tester = st.ShieldTester()
+    _worker_shield_tester.load_data(data_file)
+    _worker_shield_tester.cpu_cores = 1  # the pool runs the tests in parallel, not the engine
+    _worker_events = events
+
+
+class _JobMessages(object):
+    """ Takes the place of the message queue of compute and sends the messages of a job to the event loop """
+    def __init__(self, job_id: int):
+        self._job_id = job_id
+
+    def put(self, message: str):
+        _worker_events.put((self._job_id, AsyncShieldTester.EVENT_MESSAGE, message))
+
+
+def _compute_in_worker(job_id: int, test_case: st.TestCase, prelim: int, cancel_event) -> Optional[st.TestResult]:
+    shield_tester = _worker_shield_tester
+    try:
+        if cancel_event.is_set():
+            return None
+
+        # same number of steps as the progress bar of the user interface
+        if prelim:
+            total = int(shield_tester.calculate_number_of_tests(test_case, prelim) / prelim / st.ShieldTester.MP_CHUNK_SIZE) + 1
+        else:
+            total = int(shield_tester.calculate_number_of_tests(test_case) / len(test_case.loadout_list) / st.ShieldTester.MP_CHUNK_SIZE) + 1
+        steps = 0
+        cancelled = False
+        cancelling = False
+
+        def callback(value: int):
+            nonlocal steps, cancelled, cancelling
+            if value == st.ShieldTester.CALLBACK_STEP:
+                steps += 1
+                _worker_events.put((job_id, AsyncShieldTester.EVENT_PROGRESS, min(1.0, steps / total)))
+                if not cancelling and cancel_event.is_set():
+                    # cancel can wait for the engine, which is waiting for this callback to return
+                    cancelling = True
+                    threading.Thread(target=shield_tester.cancel).start()
+            elif value == st.ShieldTester.CALLBACK_CANCELLED:
+                cancelled = True
+
+        if prelim:
+            test_result = shield_tester.compute(test_case, callback=callback, message_queue=_JobMessages(job_id), prelim=prelim)
+        else:
+            test_result = shield_tester.compute(test_case, callback=callback, message_queue=_JobMessages(job_id))
+        return None if cancelled or cancelling else test_result
+    finally:
+        _worker_events.put((job_id, AsyncShieldTester.EVENT_DONE, None))
+
+
+class ComputeJob(object):
+    def __init__(self, job_id: int, future: asyncio.Future, cancel_event):
+        self.job_id = job_id
+        self._future = future
+        self._cancel_event = cancel_event
+        self._events = asyncio.Queue()  # type: asyncio.Queue
+
+    def _put_event(self, kind: str, value: Any):
+        self._events.put_nowait((kind, value))
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self):
+        """ Stop the test. Awaiting the job raises CancelledError afterwards. """
+        if not self._future.done():
+            self._cancel_event.set()
+            self._future.cancel()
+
+    async def result(self) -> Optional[st.TestResult]:
+        """ Wait for the test. Cancelling the task that waits also cancels the test. """
+        try:
+            return await asyncio.shield(self._future)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+    def __await__(self):
+        return self.result().__await__()
+
+    def __aiter__(self) -> AsyncIterator[Tuple[str, Any]]:
+        return self
+
+    async def __anext__(self) -> Tuple[str, Any]:
+        kind, value = await self._events.get()
+        if kind == AsyncShieldTester.EVENT_DONE:
+            self._events.put_nowait((kind, value))  # later iterations end as well
+            raise StopAsyncIteration
+        return kind, value
+
+
+class AsyncShieldTester(object):
+    EVENT_PROGRESS = "progress"
+    EVENT_MESSAGE = "message"
+    EVENT_DONE = "done"  # ends the iteration over the events of a job
+
+    def __init__(self, data_file: str = DATA_FILE, cores: int = None, result_cache: ResultCache = None):
+        """
+        :param data_file: data.json, loaded once by every worker process
+        :param cores: number of worker processes and so the number of tests running at the same time
+        :param result_cache: return cached results of identical tests and cache new ones
+        """
+        self._data_file = data_file
+        self._cores = cores or os.cpu_count()
+        self._result_cache = result_cache
+        self._job_ids = itertools.count(1)
+        self._jobs = dict()  # type: Dict[int, ComputeJob]
+        self._loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self._manager = None
+        self._events = None  # type: Optional[multiprocessing.Queue]
+        self._executor = None  # type: Optional[concurrent.futures.ProcessPoolExecutor]
+        self._reader = None  # type: Optional[threading.Thread]
+
+    async def __aenter__(self) -> "AsyncShieldTester":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _start(self):
+        """ Start the pool with the first job, the workers are started by the executor when they are needed """
+        self._loop = asyncio.get_running_loop()
+        self._manager = multiprocessing.Manager()  # cancel events of the jobs, the workers can't share them otherwise
+        self._events = multiprocessing.Queue()
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._cores, initializer=_init_worker,
+                                                                initargs=(self._data_file, self._events))
+        self._reader = threading.Thread(target=self._read_events, daemon=True)
+        self._reader.start()
+
+    def _read_events(self):
+        """ Hand the events of all workers to the event loop, until close puts None into the queue """
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            self._loop.call_soon_threadsafe(self._dispatch_event, *event)
+
+    def _dispatch_event(self, job_id: int, kind: str, value: Any):
+        job = self._jobs.get(job_id)
+        if job:
+            job._put_event(kind, value)
+            if kind == AsyncShieldTester.EVENT_DONE:
+                del self._jobs[job_id]
+
+    def _job_finished(self, job: ComputeJob, future: asyncio.Future):
+        # a job that never ran or whose worker died doesn't send EVENT_DONE
+        if future.cancelled() or future.exception() is not None:
+            self._dispatch_event(job.job_id, AsyncShieldTester.EVENT_DONE, None)
+
+    def submit(self, test_case: st.TestCase, prelim: int = 0) -> ComputeJob:
+        """
+        Start a test, has to be called from the event loop. The test case is copied when it is sent to the worker, so
+        it can be changed as soon as this returns.
+        """
+        if self._executor is None:
+            self._start()
+        job_id = next(self._job_ids)
+
+        cache_key = self._result_cache.get_key(test_case, prelim) if self._result_cache else ""
+        test_result = self._result_cache.get(cache_key) if cache_key else None
+        if test_result:
+            future = self._loop.create_future()
+            job = ComputeJob(job_id, future, None)
+            job._put_event(AsyncShieldTester.EVENT_MESSAGE, "Using cached result of an identical test.\n")
+            job._put_event(AsyncShieldTester.EVENT_DONE, None)
+            future.set_result(test_result)
+            return job
+
+        cancel_event = self._manager.Event()
+        future = self._loop.run_in_executor(self._executor, _compute_in_worker, job_id, test_case, prelim, cancel_event)
+        job = ComputeJob(job_id, future, cancel_event)
+        self._jobs[job_id] = job
+        future.add_done_callback(lambda f: self._job_finished(job, f))
+        if cache_key:
+            future.add_done_callback(lambda f: self._cache_result(cache_key, f))
+        return job
+
+    def _cache_result(self, cache_key: str, future: asyncio.Future):
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        try:
+            self._result_cache.put(cache_key, future.result())
+        except Exception as e:
+            print("Error writing result to cache")
+            print(e)
+
+    async def compute(self, test_case: st.TestCase, prelim: int = 0) -> Optional[st.TestResult]:
+        """ Run a test and return its result, None if the engine found no loadout """
+        return await self.submit(test_case, prelim)
+
+    async def close(self):
+        """ Cancel the running tests and stop the worker processes """
+        if self._executor is None:
+            return
+        for job in list(self._jobs.values()):
+            job.cancel()
+        await self._loop.run_in_executor(None, self._executor.shutdown)
+        self._events.put(None)
+        await self._loop.run_in_executor(None, self._reader.join)
+        self._manager.shutdown()
+        self._executor = None
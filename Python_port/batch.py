@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""
+Headless batch runner for the shield tester.
+
+Runs every combination of ships, shield generator classes, booster counts and damage profiles listed in a JSON file
+in one process. Data is loaded once and results are written as soon as they are available, either as JSON lines or
+as CSV depending on the extension of the output file.
+
+Example file:
+{
+    "ships": ["Anaconda", "Federal Corvette"],
+    "loadouts": ["Journal.2019-11-16T230423.01.log"],
+    "shield_classes": [0],
+    "booster_counts": [0],
+    "profiles": [{"name": "NPC", "explosive_dps": 0, "kinetic_dps": 50, "thermal_dps": 50, "absolute_dps": 10,
+                  "damage_effectiveness": 0.65, "scb_hitpoints": 0, "guardian_hitpoints": 0}],
+    "prismatics": true,
+    "short_list": true,
+    "prelim": 0,
+    "cpu_cores": 4
+}
+Leave out "ships" or use ["*"] to test all ships, including the imported ones. "loadouts" are imported before the run and
+can be journal logs, directories with journals (only the latest loadout of each ship is used) or files with the formats
+accepted by the import window. A shield class of 0 is the biggest class the ship can fit and a booster count of 0 uses
+all utility slots.
+
+Usage: python batch.py cases.json results.jsonl
+"""
+import argparse
+import copy
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List
+
+import shield_tester as st
+import journal
+from result_cache import ResultCache
+from history import ResultHistory
+
+DATA_FILE = os.path.join(os.getcwd(), "data.json")
+CACHE_DIRECTORY = os.path.join(os.getcwd(), "cache")
+HISTORY_FILE = os.path.join(os.getcwd(), "history.sqlite")
+
+PROFILE_DEFAULTS = {"name": "",
+                    "explosive_dps": 0,
+                    "kinetic_dps": 50,
+                    "thermal_dps": 50,
+                    "absolute_dps": 10,
+                    "damage_effectiveness": 0.65,
+                    "scb_hitpoints": 0,
+                    "guardian_hitpoints": 0}
+
+CSV_FIELDS = ["ship", "shield_class", "boosters", "profile", "explosive_dps", "kinetic_dps", "thermal_dps", "absolute_dps",
+              "damage_effectiveness", "scb_hitpoints", "guardian_hitpoints", "prismatics", "short_list", "prelim", "runtime", "cached",
+              "result", "loadout"]
+
+
+def import_loadouts(shield_tester: st.ShieldTester, filename: str) -> List[str]:
+    imported = list()
+    if filename.lower().endswith(".log") or os.path.isdir(filename):
+        entries = journal.find_loadouts([filename]).get_loadouts()
+    else:
+        with open(filename, "r") as file:
+            entries = st.Utility.get_loadouts_from_string(file.read().strip())
+    for entry in entries:
+        name = shield_tester.import_loadout(entry["data"] if "data" in entry else entry)
+        if name:
+            imported.append(name)
+    return imported
+
+
+def run_cases(shield_tester: st.ShieldTester, cases: Dict[str, Any], result_cache: ResultCache = None,
+              history: ResultHistory = None) -> Iterator[Dict[str, Any]]:
+    ship_names = cases.get("ships", ["*"])
+    if "*" in ship_names:
+        ship_names = shield_tester.ship_names
+    prismatics = cases.get("prismatics", True)
+    short_list = cases.get("short_list", True)
+    prelim = cases.get("prelim", 0)
+    profiles = [dict(PROFILE_DEFAULTS, **profile) for profile in cases.get("profiles", [PROFILE_DEFAULTS])]
+    shield_tester.cpu_cores = cases.get("cpu_cores", os.cpu_count())
+    shield_tester.use_prismatics = prismatics
+
+    for ship_name in ship_names:
+        test_case = shield_tester.select_ship(ship_name)
+        if not test_case:
+            print(f"Unknown ship: {ship_name}", file=sys.stderr)
+            continue
+        min_class, max_class = shield_tester.get_compatible_shield_generator_classes(test_case.ship)
+        if min_class == 0 or max_class == 0:
+            print(f"No free slots to fit shield generator in {ship_name}", file=sys.stderr)
+            continue
+
+        for shield_class in cases.get("shield_classes", [0]):
+            shield_class = shield_class or max_class
+            if not min_class <= shield_class <= max_class:
+                print(f"{ship_name} can't fit a class {shield_class} shield generator", file=sys.stderr)
+                continue
+            shield_tester.set_loadouts_for_class(test_case, module_class=shield_class, prismatics=prismatics)
+            shield_tester.set_boosters_to_test(test_case, short_list=short_list)
+
+            for boosters in cases.get("booster_counts", [0]):
+                boosters = min(boosters or test_case.ship.utility_slots, test_case.ship.utility_slots)
+                test_case.number_of_boosters_to_test = boosters
+
+                for profile in profiles:
+                    test_case.explosive_dps = profile["explosive_dps"]
+                    test_case.kinetic_dps = profile["kinetic_dps"]
+                    test_case.thermal_dps = profile["thermal_dps"]
+                    test_case.absolute_dps = profile["absolute_dps"]
+                    test_case.damage_effectiveness = profile["damage_effectiveness"]
+                    test_case.scb_hitpoints = profile["scb_hitpoints"]
+                    test_case.guardian_hitpoints = profile["guardian_hitpoints"]
+
+                    start_time = time.time()
+                    cache_key = result_cache.get_key(test_case, prelim) if result_cache else ""
+                    history_key = history.get_key(test_case, prelim) if history else ""
+                    test_result = result_cache.get(cache_key) if cache_key else None
+                    if test_result is None and history_key:
+                        test_result = history.get(history_key)
+                    cached = test_result is not None
+                    if not cached:
+                        if prelim:
+                            test_result = shield_tester.compute(copy.deepcopy(test_case), prelim=prelim)
+                        else:
+                            test_result = shield_tester.compute(copy.deepcopy(test_case))
+                        if test_result and cache_key:
+                            result_cache.put(cache_key, test_result)
+                        if test_result and history_key:
+                            history.add(history_key, test_case, test_result, profile["name"] or ship_name, shield_class, prismatics, prelim)
+
+                    loadout = ""
+                    if test_result:
+                        loadout = shield_tester.get_export(test_result.loadout, service=slef_service())
+                    yield {"ship": ship_name,
+                           "shield_class": shield_class,
+                           "boosters": boosters,
+                           "profile": profile["name"],
+                           "explosive_dps": profile["explosive_dps"],
+                           "kinetic_dps": profile["kinetic_dps"],
+                           "thermal_dps": profile["thermal_dps"],
+                           "absolute_dps": profile["absolute_dps"],
+                           "damage_effectiveness": profile["damage_effectiveness"],
+                           "scb_hitpoints": profile["scb_hitpoints"],
+                           "guardian_hitpoints": profile["guardian_hitpoints"],
+                           "prismatics": prismatics,
+                           "short_list": short_list,
+                           "prelim": prelim,
+                           "runtime": round(time.time() - start_time, 3),
+                           "cached": cached,
+                           "result": test_result.get_output_string() if test_result else "",
+                           "loadout": loadout}
+
+
+def slef_service() -> str:
+    for service in st.ShieldTester.EXPORT_SERVICES.keys():
+        if "slef" in service.lower():
+            return service
+    raise RuntimeError("SLEF export not available.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run shield tests for many ships and damage profiles without the user interface.")
+    parser.add_argument("cases", help="JSON file describing the tests to run")
+    parser.add_argument("output", help="output file, CSV if it ends with .csv, JSON lines otherwise. Use - for stdout.")
+    parser.add_argument("--data", default=DATA_FILE, help="path to data.json")
+    parser.add_argument("--no-cache", action="store_true", help="always compute results instead of using cached ones")
+    parser.add_argument("--no-history", action="store_true", help="neither use nor record results in the history")
+    args = parser.parse_args()
+
+    with open(args.cases, "r") as file:
+        cases = json.load(file)
+
+    shield_tester = st.ShieldTester()
+    shield_tester.load_data(args.data)
+    result_cache = None if args.no_cache else ResultCache(CACHE_DIRECTORY, args.data)
+    history = None if args.no_history else ResultHistory(HISTORY_FILE, args.data)
+    for filename in cases.get("loadouts", []):
+        imported = import_loadouts(shield_tester, filename)
+        print(f"Imported {len(imported)} loadouts from {filename}", file=sys.stderr)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        writer = None
+        if args.output.lower().endswith(".csv"):
+            writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+        for i, row in enumerate(run_cases(shield_tester, cases, result_cache, history), 1):
+            if writer:
+                row["loadout"] = json.dumps(row["loadout"])
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row) + "\n")
+            output.flush()
+            print(f"[{i}] {row['ship']}, class {row['shield_class']}, {row['boosters']} boosters, {row['profile'] or 'profile'}: "
+                  f"{row['runtime']:.1f}s{' (cached)' if row['cached'] else ''}", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    # On Windows calling this function is necessary.
+    multiprocessing.freeze_support()
+    main()
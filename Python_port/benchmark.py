@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the Python engine against the Go port.
+
+Runs a fixed matrix of ships, booster counts, booster lists (short and full), exhaustive and preliminary filtering and
+CPU core counts with every engine, and checks that the engines find the same survival time. The Python engine uses
+data.json, the Go port the CSV files in lib, so an agreement check also catches differences between the two data sets.
+
+Every run is a separate process, so the peak memory of one run doesn't leak into the next. Each run is repeated and the
+fastest one is kept. For every run the following is written as one JSON line:
+  * wall_time: seconds spent testing loadouts, without loading data or starting the program
+  * process_time: seconds from starting the process until it exited
+  * loadouts and loadouts_per_second: number of loadouts of the test as reported by the engine
+  * peak_rss: peak resident memory in bytes of the largest process of the run
+  * speedup: wall_time with the fewest cores of the matrix divided by wall_time of this run
+  * survival_time: best survival time, -1 if the shield never goes down
+  * agrees: whether the Go port found the same survival time as the Python engine with the same settings
+
+With --baseline the results are compared to an earlier benchmark and the exit code is 1 if a run became slower by more
+than the tolerance (and by more than MIN_SLOWDOWN seconds) or if the engines don't agree.
+
+The PowerShell version reads its settings from ShieldTestConfig.ps1 and only runs on Windows, it is not part of the
+matrix.
+
+The Go port is built from GoShieldTester into a temporary directory before the runs, so the benchmark always tests the
+current source. Pass --go to use a binary that was built before instead.
+
+Usage: python benchmark.py [-o benchmark.jsonl] [--go path/to/GoShieldTester] [--baseline old.jsonl]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DATA_FILE = os.path.join(os.getcwd(), "data.json")
+GO_DIRECTORY = os.path.join(os.getcwd(), "..", "GoShieldTester")  # the Go port expects to be started from here
+
+DEFAULT_SHIPS = ["Anaconda", "Federal Corvette", "Python", "Krait Mk II"]
+DEFAULT_BOOSTERS = [1, 2, 3, 4, 5, 6, 7, 8]
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.1  # fraction by which a run may become slower than the baseline
+MIN_SLOWDOWN = 0.05  # seconds, shorter differences are noise
+PRELIMINARY_FILTERING = 10  # same as the user interface
+PROFILE = {"explosive_dps": 0, "kinetic_dps": 50, "thermal_dps": 50, "absolute_dps": 10, "damage_effectiveness": 0.65}
+
+GO_DURATION_UNITS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_go_duration(text: str) -> float:
+    """ Convert the output of Go's time.Duration.String() (e.g. 1m2.5s or 830.2ms) to seconds """
+    return sum(float(value) * GO_DURATION_UNITS[unit] for value, unit in re.findall(r"([\d.]+)(ns|us|µs|ms|s|m|h)", text))
+
+
+def run_process(args: List[str], cwd: str = None) -> Tuple[str, int, float, Optional[int]]:
+    """
+    Run a process to its end.
+    :return: output, exit code, seconds until it exited and peak RSS in bytes of its largest process if known
+    """
+    start_time = time.perf_counter()
+    process = subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, encoding="utf-8")
+    output = process.stdout.read()
+    process.stdout.close()
+    if hasattr(os, "wait4"):
+        # the rusage of wait4 is that of this process and its children, ru_maxrss is in kilobytes on Linux, bytes on macOS
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status >> 8
+        peak_rss = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+    else:
+        process.wait()
+        peak_rss = None
+    return output, process.returncode, time.perf_counter() - start_time, peak_rss
+
+
+def run_python(case: Dict[str, Any], data_file: str) -> Dict[str, Any]:
+    output, returncode, process_time, peak_rss = run_process([sys.executable, os.path.abspath(__file__), "--data", data_file,
+                                                              "--child", json.dumps(case)])
+    if returncode != 0:
+        raise RuntimeError(f"Python engine failed:\n{output}")
+    result = json.loads(output.strip().splitlines()[-1])
+    result.update(process_time=process_time, peak_rss=peak_rss)
+    return result
+
+
+def run_child(case: Dict[str, Any], data_file: str):
+    """ Run one test with the Python engine and print the result as JSON. Started by run_python in a new process. """
+    import copy
+    import shield_tester as st
+
+    shield_tester = st.ShieldTester()
+    shield_tester.load_data(data_file)
+    shield_tester.cpu_cores = case["cores"]
+    shield_tester.use_prismatics = True
+
+    test_case = shield_tester.select_ship(case["ship"])
+    if not test_case:
+        raise RuntimeError(f"Unknown ship: {case['ship']}")
+    min_class, max_class = shield_tester.get_compatible_shield_generator_classes(test_case.ship)
+    shield_class = case["shield_class"] or max_class
+    shield_tester.set_loadouts_for_class(test_case, module_class=shield_class, prismatics=True)
+    shield_tester.set_boosters_to_test(test_case, short_list=case["short_list"])
+    test_case.number_of_boosters_to_test = min(case["boosters"], test_case.ship.utility_slots)
+    for key, value in PROFILE.items():
+        setattr(test_case, key, value)
+    prelim = PRELIMINARY_FILTERING if case["prelim"] else 0
+
+    loadouts = shield_tester.calculate_number_of_tests(test_case, prelim) if prelim else shield_tester.calculate_number_of_tests(test_case)
+    start_time = time.perf_counter()
+    if prelim:
+        test_result = shield_tester.compute(copy.deepcopy(test_case), prelim=prelim)
+    else:
+        test_result = shield_tester.compute(copy.deepcopy(test_case))
+    wall_time = time.perf_counter() - start_time
+
+    survival_time = test_result.survival_time if test_result else None
+    print(json.dumps({"shield_class": shield_class,
+                      "boosters": test_case.number_of_boosters_to_test,
+                      "loadouts": loadouts,
+                      "wall_time": wall_time,
+                      "survival_time": survival_time if survival_time is None or survival_time > 0 else -1}))
+
+
+def run_go(case: Dict[str, Any], go_binary: str) -> Dict[str, Any]:
+    args = [os.path.abspath(go_binary), "-ship", case["ship"], "-boosters", str(case["boosters"]), "-cores", str(case["cores"]),
+            "-edps", str(PROFILE["explosive_dps"]), "-kdps", str(PROFILE["kinetic_dps"]), "-tdps", str(PROFILE["thermal_dps"]),
+            "-adps", str(PROFILE["absolute_dps"]), "-dmg", str(PROFILE["damage_effectiveness"] * 100)]
+    if case["shield_class"]:
+        args += ["-size", str(case["shield_class"])]
+    if case["short_list"]:
+        args.append("-shortboost")
+    output, returncode, process_time, peak_rss = run_process(args, cwd=GO_DIRECTORY)
+    if returncode != 0:
+        raise RuntimeError(f"Go port failed:\n{output}")
+
+    # the number of loadouts before dominated variants are removed, so it can be compared with the Python engine
+    generators, boosters = map(int, re.search(r"Loaded (\d+) shields and (\d+) boosters", output).groups())
+    loadouts = generators * number_of_combinations(boosters, case["boosters"])
+    wall_time = parse_go_duration(re.search(r"loadouts in (\S+)", output).group(1))
+    survival_time = re.search(r"Survival Time:\s+(.*)", output)
+    if survival_time:
+        survival_time = -1 if "Didn't die" in survival_time.group(1) else float(survival_time.group(1).split()[0])
+    return {"shield_class": case["shield_class"],
+            "boosters": case["boosters"],
+            "loadouts": loadouts,
+            "wall_time": wall_time,
+            "survival_time": survival_time,
+            "process_time": process_time,
+            "peak_rss": peak_rss}
+
+
+def build_go(directory: str) -> str:
+    """ Build the Go port into the directory and return the path of the binary """
+    go_binary = os.path.join(directory, "GoShieldTester.exe" if sys.platform == "win32" else "GoShieldTester")
+    try:
+        process = subprocess.run(["go", "build", "-o", go_binary, "."], cwd=GO_DIRECTORY, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT, universal_newlines=True)
+    except OSError as e:
+        raise RuntimeError(f"Can't run go to build the Go port, install Go or pass --go: {e}")
+    if process.returncode != 0:
+        raise RuntimeError(f"Building the Go port failed:\n{process.stdout}")
+    return go_binary
+
+
+def number_of_combinations(variants: int, boosters: int) -> int:
+    """ Number of booster loadouts when the order of the boosters doesn't matter """
+    result = 1
+    for i in range(boosters):
+        result = result * (variants + i) // (i + 1)
+    return result
+
+
+def same_survival_time(a: Optional[float], b: Optional[float]) -> bool:
+    if a is None or b is None:
+        return a is b
+    if a < 0 or b < 0:
+        return a < 0 and b < 0
+    return abs(a - b) <= max(0.01, 1e-4 * a)  # the Go port prints two decimals
+
+
+def get_key(row: Dict[str, Any]) -> Tuple:
+    return row["engine"], row["ship"], row["boosters"], row["short_list"], row["prelim"], row["cores"]
+
+
+def run_benchmark(args: argparse.Namespace):
+    engines = args.engines.split(",")
+    cores = sorted(args.cores)
+    cases = [{"ship": ship, "boosters": boosters, "short_list": short_list, "prelim": prelim, "cores": core_count,
+              "shield_class": args.shield_class}
+             for ship, boosters, short_list, prelim, core_count in itertools.product(args.ships, args.boosters, args.lists, args.modes, cores)]
+
+    rows = list()
+    for i, case in enumerate(cases, 1):
+        results = dict()
+        for engine in engines:
+            if engine == "go" and case["prelim"]:
+                continue  # the Go port has no preliminary filtering
+            case_for_engine = dict(case)
+            if engine == "go" and "python" in results:
+                # test the same shield generator class and booster count as the Python engine
+                case_for_engine.update(shield_class=results["python"]["shield_class"], boosters=results["python"]["boosters"])
+            try:
+                runs = [run_python(case_for_engine, args.data) if engine == "python" else run_go(case_for_engine, args.go)
+                        for _ in range(args.repeat)]
+            except (RuntimeError, OSError, AttributeError) as e:
+                print(f"[{i}/{len(cases)}] {engine}: {e}", file=sys.stderr)
+                continue
+            result = min(runs, key=lambda run: run["wall_time"])
+            result["peak_rss"] = max((run["peak_rss"] for run in runs if run["peak_rss"] is not None), default=None)
+            results[engine] = result
+
+        for engine, result in results.items():
+            row = dict(case, engine=engine, **result)
+            row["loadouts_per_second"] = round(row["loadouts"] / row["wall_time"]) if row["wall_time"] > 0 else None
+            if engine == "go" and "python" in results:
+                row["agrees"] = same_survival_time(results["python"]["survival_time"], result["survival_time"])
+            rows.append(row)
+            print(f"[{i}/{len(cases)}] {engine}: {case['ship']}, {row['boosters']} boosters, {'short' if case['short_list'] else 'full'} list, "
+                  f"{'prelim' if case['prelim'] else 'exhaustive'}, {case['cores']} cores: {row['wall_time']:.3f}s, "
+                  f"{row['loadouts_per_second'] or 0:n} loadouts/s{'' if row.get('agrees', True) else ', DISAGREES'}", file=sys.stderr)
+
+    # speedup compared to the run with the fewest cores
+    by_key = {get_key(row): row for row in rows}
+    for row in rows:
+        first = by_key.get(get_key(dict(row, cores=cores[0])))
+        if first and row["wall_time"] > 0:
+            row["speedup"] = round(first["wall_time"] / row["wall_time"], 2)
+    return rows
+
+
+def compare_to_baseline(rows: List[Dict[str, Any]], baseline_file: str, tolerance: float) -> bool:
+    """ Print runs that became slower than in the baseline and runs where the engines disagree, return if there were none """
+    with open(baseline_file, "r", encoding="utf-8") as file:
+        baseline = {get_key(row): row for row in map(json.loads, file) if row}
+
+    ok = True
+    for row in rows:
+        if not row.get("agrees", True):
+            print(f"Engines disagree: {row['ship']}, {row['boosters']} boosters, {'short' if row['short_list'] else 'full'} list", file=sys.stderr)
+            ok = False
+        old = baseline.get(get_key(row))
+        if old and row["wall_time"] > old["wall_time"] * (1 + tolerance) and row["wall_time"] - old["wall_time"] > MIN_SLOWDOWN:
+            print(f"Slower: {row['engine']}, {row['ship']}, {row['boosters']} boosters, {'short' if row['short_list'] else 'full'} list, "
+                  f"{'prelim' if row['prelim'] else 'exhaustive'}, {row['cores']} cores: {old['wall_time']:.3f}s -> {row['wall_time']:.3f}s",
+                  file=sys.stderr)
+            ok = False
+    return ok
+
+
+def int_list(text: str) -> List[int]:
+    return [int(value) for value in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python engine against the Go port.")
+    parser.add_argument("-o", "--output", default="-", help="output file with one JSON line per run, - for stdout")
+    parser.add_argument("--engines", default="python,go", help="comma separated engines to run: python, go")
+    parser.add_argument("--go", help="Go port binary, by default the Go port is built from source into a temporary directory")
+    parser.add_argument("--data", default=DATA_FILE, help="path to data.json")
+    parser.add_argument("--ships", nargs="+", default=DEFAULT_SHIPS, help="ships to test")
+    parser.add_argument("--boosters", type=int_list, default=DEFAULT_BOOSTERS, help="comma separated booster counts")
+    parser.add_argument("--cores", type=int_list, default=sorted({1, os.cpu_count() or 1}), help="comma separated CPU core counts")
+    parser.add_argument("--lists", type=lambda text: [value == "short" for value in text.split(",")], default=[True, False],
+                        help="comma separated booster lists: short, full")
+    parser.add_argument("--modes", type=lambda text: [value == "prelim" for value in text.split(",")], default=[False, True],
+                        help="comma separated modes: exhaustive, prelim")
+    parser.add_argument("--shield-class", type=int, default=0, help="shield generator class, 0 for the biggest one the ship can fit")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs of each test, the fastest one is kept")
+    parser.add_argument("--baseline", help="earlier benchmark output to check for slower runs")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="fraction by which a run may be slower than the baseline")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child), args.data)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        if "go" in args.engines.split(",") and not args.go:
+            try:
+                args.go = build_go(directory)
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+        rows = run_benchmark(args)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for row in rows:
+            output.write(json.dumps(row) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.baseline and not compare_to_baseline(rows, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # On Windows calling this function is necessary.
+    multiprocessing.freeze_support()
+    main()
@@ -8,27 +8,69 @@ This is just an implementation in Python of his program featuring a user interfa
 
 Build to exe using the command: "pyinstaller --noconsole elite_shield_tester.py"
 Don't forget to copy csv files into the exe's directory afterwards.
+
+Only what is needed to show the window is imported at startup. The engine (shield_tester and the multiprocessing
+machinery behind it) is imported and data.json is loaded in a background thread while the window paints, modules like
+webbrowser are imported when they are first used. Startup timings are appended to startup_times.jsonl.
 """
+import time
+_START_TIME = time.perf_counter()
+
 import json
 import os
 import re
 import locale
-import multiprocessing
 import sys
 import threading
 import queue
-import copy
-import webbrowser
 from pathlib import Path
 import tkinter as tk
-from typing import Dict, Set
+from typing import Dict, List, Set
 from tkinter import ttk, messagebox, scrolledtext, filedialog
-import shield_tester as st
+
+# imported in the background by _import_engine
+st = None
+ResultCache = None
+ResultHistory = None
 
 # Configuration
 VERSION = "1.1"
 DATA_FILE = os.path.join(os.getcwd(), "data.json")
 QUICK_GUIDE_FILE = os.path.join(os.getcwd(), "quick_guide.txt")
+CACHE_DIRECTORY = os.path.join(os.getcwd(), "cache")
+HISTORY_FILE = os.path.join(os.getcwd(), "history.sqlite")
+JOURNAL_STATE_FILE = os.path.join(os.getcwd(), "journal_state.json")
+STARTUP_TIMES_FILE = os.path.join(os.getcwd(), "startup_times.jsonl")
+
+
+def _import_engine():
+    """ Import the engine, the result cache and the history, which import the engine as well. """
+    global st, ResultCache, ResultHistory
+    import shield_tester as st
+    from result_cache import ResultCache
+    from history import ResultHistory
+
+
+class StartupTimes(object):
+    """ Seconds since the start of the import of this module at which each step of the startup was reached """
+    def __init__(self):
+        self.times = dict()  # type: Dict[str, float]
+
+    def record(self, step: str):
+        self.times[step] = round(time.perf_counter() - _START_TIME, 4)
+
+    def write(self, filename: str):
+        entry = {"version": VERSION,
+                 "frozen": getattr(sys, "frozen", False),
+                 "python": sys.version.split()[0],
+                 "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+        entry.update(self.times)
+        with open(filename, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+_startup_times = StartupTimes()
+_startup_times.record("imports")
 
 
 class CustomEntry(tk.Entry):
@@ -84,20 +126,21 @@ class TextEntry(CustomEntry):
 
 
 class TabData(object):
-    def __init__(self, tab: scrolledtext.ScrolledText = None, test_result: st.TestResult = None):
+    def __init__(self, tab: scrolledtext.ScrolledText = None, test_result: "st.TestResult" = None):
         self.tab = tab
         self.test_result = test_result
 
 
 class ShieldTesterUi(tk.Tk):
-    EVENT_COMPUTE_OUTPUT = "<<EventComputeOutput>>"
     EVENT_COMPUTE_COMPLETE = "<<EventComputeComplete>>"
     EVENT_COMPUTE_CANCELLED = "<<EventComputeCancelled>>"
-    EVENT_PROGRESS_BAR_STEP = "<<EventProgressBarStep>>"
     EVENT_WARNING_WRITE_LOGFILE = "<<EventShowWarningWriteLogfile>>"
+    EVENT_DATA_LOADED = "<<EventDataLoaded>>"
+    EVENT_JOURNALS_READ = "<<EventJournalsRead>>"
     EVENT_TAB_CHANGED = "<<NotebookTabChanged>>"
 
     PRELIMINARY_FILTERING = 10  # set preliminary filtering to 10 which should find almost always the same result
+    OUTPUT_INTERVAL = 100  # milliseconds between updates of the progress bar and the output while computing
 
     KEY_QUICK_GUIDE = "Quick Guide"
 
@@ -108,20 +151,33 @@ class ShieldTesterUi(tk.Tk):
         self.title("Shield Tester v{}".format(VERSION))
         self._runtime = 0
 
-        self._shield_tester = st.ShieldTester()
+        self._shield_tester = None  # type: st.ShieldTester
         self._test_case = None  # type: st.TestCase
+        self._result_cache = None  # type: ResultCache
+        self._history = None  # type: ResultHistory
+        self._load_data_error = None  # type: Exception
+        self._compute_cancelled = False
+        self._journal_watcher = None  # type: journal.JournalWatcher
+        self._journal_poll_id = None
         self._lockable_ui_elements = list()
 
         # tab_name used as key for tabs
         self._active_tab_name = ""
         self._tabs = dict()  # type: Dict[str, TabData]
 
-        self.bind(ShieldTesterUi.EVENT_COMPUTE_OUTPUT, lambda e: self._event_process_output(e))
         self.bind(ShieldTesterUi.EVENT_COMPUTE_COMPLETE, lambda e: self._event_compute_complete(e))
         self.bind(ShieldTesterUi.EVENT_COMPUTE_CANCELLED, lambda e: self._event_compute_cancelled(e))
-        self.bind(ShieldTesterUi.EVENT_PROGRESS_BAR_STEP, lambda e: self._event_progress_bar_step(e))
         self.bind(ShieldTesterUi.EVENT_WARNING_WRITE_LOGFILE, lambda e: self._event_show_warning_logfile(e))
+        self.bind(ShieldTesterUi.EVENT_DATA_LOADED, lambda e: self._event_data_loaded(e))
+        self.bind(ShieldTesterUi.EVENT_JOURNALS_READ, lambda e: self._event_journals_read(e))
+        # the compute thread only counts steps and queues messages, the Tk thread picks both up every OUTPUT_INTERVAL
         self._message_queue = queue.SimpleQueue()
+        self._progress_steps = 0
+        self._progress_total = 1
+        self._progress_lock = threading.Lock()
+        self._output_id = None
+        # journals are read on a worker thread as well, it queues the result or the error for the Tk thread
+        self._journal_queue = queue.SimpleQueue()
 
         # add some padding
         tk.Frame(self, width=10, height=10).grid(row=0, column=0, sticky=tk.N)
@@ -129,13 +185,19 @@ class ShieldTesterUi(tk.Tk):
 
         # ---------------------------------------------------------------------------------------------------
         # menu
-        menu_bar = tk.Menu(self, tearoff=False)
-        self.config(menu=menu_bar)
+        self._menu_bar = tk.Menu(self, tearoff=False)
+        self.config(menu=self._menu_bar)
 
         ship_menu = tk.Menu(self, tearoff=False)
         ship_menu.add_command(label="Import...", command=self._open_import_window)
         ship_menu.add_command(label="Load journal...", command=self._load_journal_log)
-        menu_bar.add_cascade(label="Ship", menu=ship_menu)
+        ship_menu.add_command(label="Load journal directory...", command=self._load_journal_directory)
+        ship_menu.add_separator()
+        self._watch_journals = tk.IntVar(self)
+        ship_menu.add_checkbutton(label="Watch journals", variable=self._watch_journals, command=self._watch_journals_command)
+        self._recompute_on_loadout_change = tk.IntVar(self)
+        ship_menu.add_checkbutton(label="Recompute when the selected ship changes", variable=self._recompute_on_loadout_change)
+        self._menu_bar.add_cascade(label="Ship", menu=ship_menu, state=tk.DISABLED)  # enabled once the data is loaded
 
         def headline(frame, title, h_row):
             # headline, use this instead of LabelFrame to keep using the same grid
@@ -313,7 +375,7 @@ class ShieldTesterUi(tk.Tk):
         export_frame.grid(row=1, column=0, sticky=tk.NSEW, padx=ShieldTesterUi.PADDING, pady=ShieldTesterUi.PADDING)
         export_frame.columnconfigure(0, weight=1)
 
-        self._progress_bar = ttk.Progressbar(export_frame, orient="horizontal", mode="determinate")
+        self._progress_bar = ttk.Progressbar(export_frame, orient="horizontal", mode="determinate", maximum=1.0)
         self._progress_bar.grid(row=0, column=0, sticky=tk.NSEW, padx=ShieldTesterUi.PADDING, pady=ShieldTesterUi.PADDING)
         self._progress_bar.config(value=0)
 
@@ -322,8 +384,7 @@ class ShieldTesterUi(tk.Tk):
         self._export_button.config(state=tk.DISABLED)
 
         self._export_select_var = tk.StringVar(self)
-        self._export_select_var.set(list(st.ShieldTester.EXPORT_SERVICES.keys())[0])
-        self._export_select = tk.OptionMenu(export_frame, self._export_select_var, *st.ShieldTester.EXPORT_SERVICES.keys())
+        self._export_select = tk.OptionMenu(export_frame, self._export_select_var, "")
         self._export_select.config(width=10)
         self._export_select.grid(row=0, column=2, sticky=tk.EW, padx=ShieldTesterUi.PADDING, pady=ShieldTesterUi.PADDING)
 
@@ -334,40 +395,103 @@ class ShieldTesterUi(tk.Tk):
         right_frame.columnconfigure(0, weight=1)
 
         self._lock_ui_elements()
-        self.after(100, self._load_data)
-        self.after(120, self._load_quick_guide)
+        self.after_idle(self._event_window_shown)
 
         def set_window_size():
             self.minsize(self.winfo_reqwidth(), self.winfo_reqheight() + 40)  # TODO remove hack
 
         self.after(100, set_window_size)
 
-    def _load_journal_log(self):
+    @staticmethod
+    def _get_journal_directory() -> str:
         path = os.path.join(str(Path.home()), "Saved Games", "Frontier Developments", "Elite Dangerous")
         if not os.path.exists(path):
             path = str(Path.home())
-        file_names = sorted(filedialog.askopenfilenames(initialdir=path, title="Select journal file", filetypes=(("log files", "*.log"), ("all files", "*.*"))))
+        return path
+
+    def _load_journal_log(self):
+        file_names = sorted(filedialog.askopenfilenames(initialdir=self._get_journal_directory(), title="Select journal file",
+                                                        filetypes=(("log files", "*.log"), ("all files", "*.*"))))
+        if file_names:
+            self._import_journals(file_names)
+
+    def _load_journal_directory(self):
+        directory = filedialog.askdirectory(initialdir=self._get_journal_directory(), title="Select journal directory")
+        if directory:
+            self._import_journals([directory])
+
+    def _import_journals(self, paths: List[str]):
+        # years of journals take a while to read, the ship menu stays disabled until they are imported
+        self._menu_bar.entryconfig("Ship", state=tk.DISABLED)
+        threading.Thread(target=self._import_journals_background, args=(paths,), daemon=True).start()
+
+    def _import_journals_background(self, paths: List[str]):
+        """ Runs on a worker thread, the loadouts are imported by _event_journals_read on the Tk thread """
+        # noinspection PyBroadException
         try:
+            import journal
+            self._journal_queue.put(journal.find_loadouts(paths))
+        except Exception as e:
+            self._journal_queue.put(e)
+        self.event_generate(self.EVENT_JOURNALS_READ, when="tail")
+
+    def _event_journals_read(self, event):
+        self._menu_bar.entryconfig("Ship", state=tk.NORMAL)
+        result = self._journal_queue.get_nowait()
+        try:
+            if isinstance(result, Exception):
+                raise result
             imported = set()
-            if file_names:
-                for filename in file_names:
-                    with open(filename, "r") as file:
-                        for line in file:
-                            event = json.loads(line)
-                            if event["event"] == "Loadout":
-                                ship_name = self._shield_tester.import_loadout(event)
-                                if ship_name:
-                                    imported.add(ship_name)
-                if len(imported) > 0:
-                    self._refresh_ship_names(imported_ships=imported)
-                    messagebox.showinfo("Import successful.", "You can find the following builds in the ship choices:\n" + "\n".join(sorted(imported)))
-                else:
-                    messagebox.showinfo("Nothing imported.", f"Could not find any loadout events in the provided logfile{'s' if len(file_names) > 1 else ''}.")
-        except (json.decoder.JSONDecodeError, KeyError):
-            messagebox.showerror("Could not read log file", "Is it a log file of Elite Dangerous?")
+            for event in result.get_loadouts():
+                ship_name = self._shield_tester.import_loadout(event)
+                if ship_name:
+                    imported.add(ship_name)
+            skipped = f"\n\nSkipped {result.bad_lines} lines that could not be read." if result.bad_lines else ""
+            if len(imported) > 0:
+                self._refresh_ship_names(imported_ships=imported)
+                messagebox.showinfo("Import successful.", "You can find the following builds in the ship choices:\n" + "\n".join(sorted(imported)) + skipped)
+            else:
+                messagebox.showinfo("Nothing imported.", f"Could not find any loadout events in the provided logfile{'s' if result.files != 1 else ''}." + skipped)
         except Exception as e:
             messagebox.showerror("Could not read log file", e)
 
+    def _watch_journals_command(self):
+        if self._journal_poll_id:
+            self.after_cancel(self._journal_poll_id)
+            self._journal_poll_id = None
+        if not self._watch_journals.get():
+            return
+        if not self._journal_watcher:
+            directory = filedialog.askdirectory(initialdir=self._get_journal_directory(), title="Select journal directory to watch")
+            if not directory:
+                self._watch_journals.set(0)
+                return
+            import journal
+            self._journal_watcher = journal.JournalWatcher(directory, JOURNAL_STATE_FILE)
+            # loadouts that were read before a restart aren't read again
+            self._import_watched_loadouts(self._journal_watcher.get_loadouts())
+        self._poll_journals()
+
+    def _poll_journals(self):
+        try:
+            self._import_watched_loadouts(self._journal_watcher.poll())
+        except Exception as e:
+            print("Error reading journals")
+            print(e)
+        self._journal_poll_id = self.after(self._journal_watcher.POLL_INTERVAL * 1000, self._poll_journals)
+
+    def _import_watched_loadouts(self, events: List[Dict]):
+        imported = set()
+        for event in events:
+            ship_name = self._shield_tester.import_loadout(event)
+            if ship_name:
+                imported.add(ship_name)
+        if imported:
+            self._refresh_ship_names(imported_ships=imported)
+            computing = str(self._cancel_button["state"]) == tk.NORMAL
+            if self._recompute_on_loadout_change.get() and self._ship_select_var.get() in imported and not computing:
+                self._compute()
+
     def _open_import_window(self):
         window = tk.Toplevel(self)
         window.grab_set()
@@ -519,6 +643,7 @@ class ShieldTesterUi(tk.Tk):
                     self.update()
                     messagebox.showinfo("SLEF", "SLEF data has been copied to your clipboard.")
                 else:
+                    import webbrowser
                     webbrowser.open(export)
             except RuntimeError as e:
                 messagebox.showerror("Could not create link.", e)
@@ -540,8 +665,7 @@ class ShieldTesterUi(tk.Tk):
     def _load_quick_guide(self):
         if os.path.exists(QUICK_GUIDE_FILE):
             with open(QUICK_GUIDE_FILE, "r") as file:
-                for line in file:
-                    self._write_to_text_widget(line, ShieldTesterUi.KEY_QUICK_GUIDE)
+                self._write_to_text_widget(file.read(), ShieldTesterUi.KEY_QUICK_GUIDE)
 
     def _refresh_ship_names(self, preselect=False, imported_ships: Set[str] = set()):
         ship_names = self._shield_tester.ship_names
@@ -555,20 +679,61 @@ class ShieldTesterUi(tk.Tk):
         elif self._ship_select_var.get() in imported_ships:
             self._ship_select_command()  # trigger select to force update of UI
 
+    def _event_window_shown(self):
+        _startup_times.record("window")
+        self._load_data()
+        self._load_quick_guide()
+
     def _load_data(self):
-        try:
-            self._shield_tester.load_data(DATA_FILE)
-            self._refresh_ship_names(preselect=True)
-            self._ship_select.config(state=tk.NORMAL)
-            self._ship_select.config(takefocus=True)
-            self._ship_select_command()
+        threading.Thread(target=self._load_data_background, daemon=True).start()
 
+    def _load_data_background(self):
+        # noinspection PyBroadException
+        try:
+            _import_engine()
+            _startup_times.record("engine")
+            shield_tester = st.ShieldTester()
+            shield_tester.load_data(DATA_FILE)
+            result_cache = ResultCache(CACHE_DIRECTORY, DATA_FILE)
+            try:
+                history = ResultHistory(HISTORY_FILE, DATA_FILE)
+            except Exception as e:
+                print("Error opening history")
+                print(e)
+                history = None
+            self._shield_tester, self._result_cache, self._history, self._load_data_error = shield_tester, result_cache, history, None
         except Exception as e:
-            print(e)
+            self._load_data_error = e
+        self.event_generate(self.EVENT_DATA_LOADED, when="tail")
+
+    def _event_data_loaded(self, event):
+        if self._load_data_error:
+            print(self._load_data_error)
             if tk.messagebox.askretrycancel(
                     "No data", "Could not read JSON file.\nPlease place it in the same directory as this program.\n"
                     "Required: {data}".format(data=os.path.basename(DATA_FILE))):
                 self._load_data()
+            return
+
+        _startup_times.record("data")
+        self._menu_bar.entryconfig("Ship", state=tk.NORMAL)
+        self._export_select["menu"].delete(0, tk.END)
+        for service in st.ShieldTester.EXPORT_SERVICES.keys():
+            # noinspection PyProtectedMember
+            self._export_select["menu"].add_command(label=service, command=tk._setit(self._export_select_var, service))
+        self._export_select_var.set(list(st.ShieldTester.EXPORT_SERVICES.keys())[0])
+
+        self._refresh_ship_names(preselect=True)
+        self._ship_select.config(state=tk.NORMAL)
+        self._ship_select.config(takefocus=True)
+        self._ship_select_command()
+
+        _startup_times.record("ready")
+        try:
+            _startup_times.write(STARTUP_TIMES_FILE)
+        except OSError as e:
+            print("Error writing startup times")
+            print(e)
 
     def _lock_ui_elements(self):
         for element in self._lockable_ui_elements:
@@ -600,15 +765,32 @@ class ShieldTesterUi(tk.Tk):
         if len(self._tabs) == 0:
             self._export_button.config(state=tk.DISABLED)
 
-    def _event_process_output(self, event):
-        if not self._message_queue.empty():
-            self._write_to_text_widget(self._message_queue.get_nowait())
-
-    def _event_progress_bar_step(self, event):
-        if self._progress_bar:
-            self._progress_bar.step()
+    def _get_progress(self) -> float:
+        """ Fraction of the compute steps that are done """
+        with self._progress_lock:
+            return min(1.0, self._progress_steps / self._progress_total)
+
+    def _update_output(self):
+        """ Show all messages that arrived since the last update with one insert and move the progress bar """
+        messages = list()
+        while not self._message_queue.empty():
+            messages.append(self._message_queue.get_nowait())
+        if messages:
+            self._write_to_text_widget("".join(messages))
+        self._progress_bar.config(value=self._get_progress())
+
+    def _output_loop(self):
+        self._update_output()
+        self._output_id = self.after(ShieldTesterUi.OUTPUT_INTERVAL, self._output_loop)
+
+    def _stop_output_loop(self):
+        if self._output_id:
+            self.after_cancel(self._output_id)
+            self._output_id = None
+        self._update_output()
 
     def _event_compute_cancelled(self, event):
+        self._stop_output_loop()
         self._unlock_ui_elements()
         self._progress_bar.stop()
         self._write_to_text_widget("\n")
@@ -617,6 +799,7 @@ class ShieldTesterUi(tk.Tk):
         self._cancel_button.config(state=tk.DISABLED)
 
     def _event_compute_complete(self, event):
+        self._stop_output_loop()
         self._unlock_ui_elements()
         self._progress_bar.stop()
         self._cancel_button.config(state=tk.DISABLED)
@@ -654,21 +837,52 @@ class ShieldTesterUi(tk.Tk):
 
     def _compute_callback(self, value: int):
         # ensure thread safe communication
+        # steps and messages are picked up by _output_loop, so the compute thread never waits for the Tk thread
         if value == st.ShieldTester.CALLBACK_STEP:
-            self.event_generate(self.EVENT_PROGRESS_BAR_STEP, when="tail")
-        elif value == st.ShieldTester.CALLBACK_MESSAGE:
-            self.event_generate(self.EVENT_COMPUTE_OUTPUT, when="tail")
+            with self._progress_lock:
+                self._progress_steps += 1
         elif value == st.ShieldTester.CALLBACK_CANCELLED:
+            self._compute_cancelled = True
             self.event_generate(self.EVENT_COMPUTE_CANCELLED, when="tail")
 
-    def _compute_background(self, use_prelim: int = 0):
-        data = self._tabs.get(self._active_tab_name)
+    def _compute_background(self, tab_name: str, use_prelim: int = 0, shield_class: int = 0, prismatics: bool = True):
+        """ Runs on a worker thread, everything it needs from the widgets is passed in by _compute """
+        import copy
+        data = self._tabs.get(tab_name)
         test_case = copy.deepcopy(self._test_case)
-        if use_prelim:
-            test_results = self._shield_tester.compute(test_case, callback=self._compute_callback, message_queue=self._message_queue,
-                                                       prelim=ShieldTesterUi.PRELIMINARY_FILTERING)
-        else:
-            test_results = self._shield_tester.compute(test_case, callback=self._compute_callback, message_queue=self._message_queue)
+        prelim = ShieldTesterUi.PRELIMINARY_FILTERING if use_prelim else 0
+        cache_key = self._result_cache.get_key(test_case, prelim) if self._result_cache else ""
+        history_key = self._history.get_key(test_case, prelim) if self._history else ""
+        test_results = self._result_cache.get(cache_key) if cache_key else None
+        if test_results:
+            self._message_queue.put("Using cached result of an identical test.\n")
+        elif history_key:
+            try:
+                test_results = self._history.get(history_key)
+            except Exception as e:
+                print("Error reading history")
+                print(e)
+            if test_results:
+                self._message_queue.put("Using the result of an identical test from the history.\n")
+        if not test_results:
+            if use_prelim:
+                test_results = self._shield_tester.compute(test_case, callback=self._compute_callback, message_queue=self._message_queue,
+                                                           prelim=ShieldTesterUi.PRELIMINARY_FILTERING)
+            else:
+                test_results = self._shield_tester.compute(test_case, callback=self._compute_callback, message_queue=self._message_queue)
+            if test_results and cache_key and not self._compute_cancelled:
+                try:
+                    self._result_cache.put(cache_key, test_results)
+                except Exception as e:
+                    print("Error writing result to cache")
+                    print(e)
+            if test_results and history_key and not self._compute_cancelled:
+                # self._test_case is what the key was made of, compute changed the copy
+                try:
+                    self._history.add(history_key, self._test_case, test_results, tab_name, shield_class, prismatics, prelim)
+                except Exception as e:
+                    print("Error writing result to history")
+                    print(e)
         if data:
             data.test_result = test_results
         self.event_generate(self.EVENT_COMPUTE_COMPLETE, when="tail")
@@ -707,13 +921,19 @@ class ShieldTesterUi(tk.Tk):
             steps = int(self._shield_tester.calculate_number_of_tests(self._test_case)
                         / len(self._test_case.loadout_list)
                         / st.ShieldTester.MP_CHUNK_SIZE) + 1
-        self._progress_bar.config(maximum=steps)
+        with self._progress_lock:
+            self._progress_steps = 0
+            self._progress_total = steps
+        self._progress_bar.config(value=0)
 
         self._write_to_text_widget(self._test_case.get_output_string())
         self._write_to_text_widget("\n")
 
         self._cancel_button.config(state=tk.NORMAL)
-        t = threading.Thread(target=self._compute_background, args=(use_prelim,))
+        self._compute_cancelled = False
+        self._output_loop()
+        t = threading.Thread(target=self._compute_background, args=(self._active_tab_name, use_prelim, int(self._sg_class_slider.get()),
+                                                                     self._shield_tester.use_prismatics))
         t.start()
 
 
@@ -724,6 +944,7 @@ def main():
 
 
 if __name__ == '__main__':
+    import multiprocessing
     # On Windows calling this function is necessary.
     multiprocessing.freeze_support()
     main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+History of test results in a SQLite database.
+
+Every computed test is appended with its ship, shield generator class, booster count and damage profile as columns,
+next to the pickled TestCase and TestResult and the result as text. The columns most searches use are indexed. Tests with
+the same key as a result cache entry (same test case, preliminary filtering and data.json) are identical, so a test
+that was run before is answered from the history even after its cache entry is gone. Rows are never changed or
+deleted. The text logs of write_log are still written as a readable view of the same results.
+
+Usage: python history.py history.csv [--ship Anaconda] [--shield-class 7] [--boosters 6]
+The output is CSV if the file ends with .csv and JSON lines otherwise. Use - for stdout.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import shield_tester as st
+from result_cache import ResultCache, get_test_key
+
+HISTORY_FILE = os.path.join(os.getcwd(), "history.sqlite")
+
+PROFILE_COLUMNS = ["explosive_dps", "kinetic_dps", "thermal_dps", "absolute_dps", "damage_effectiveness", "scb_hitpoints", "guardian_hitpoints"]
+EXPORT_COLUMNS = ["id", "time", "name", "ship", "custom_name", "shield_class", "boosters"] + PROFILE_COLUMNS + \
+                 ["prismatics", "prelim", "survival_time", "result"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ship TEXT NOT NULL,
+    custom_name TEXT NOT NULL,
+    shield_class INTEGER NOT NULL,
+    boosters INTEGER NOT NULL,
+    explosive_dps REAL NOT NULL,
+    kinetic_dps REAL NOT NULL,
+    thermal_dps REAL NOT NULL,
+    absolute_dps REAL NOT NULL,
+    damage_effectiveness REAL NOT NULL,
+    scb_hitpoints REAL NOT NULL,
+    guardian_hitpoints REAL NOT NULL,
+    prismatics INTEGER NOT NULL,
+    prelim INTEGER NOT NULL,
+    survival_time REAL,
+    result TEXT NOT NULL,
+    test_case BLOB NOT NULL,
+    test_result BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tests_key ON tests (key);
+CREATE INDEX IF NOT EXISTS tests_setup ON tests (ship, shield_class, boosters, explosive_dps, kinetic_dps, thermal_dps, absolute_dps,
+                                                 damage_effectiveness);
+"""
+
+
+class ResultHistory(object):
+    def __init__(self, filename: str, data_file: str = ""):
+        """ data_file is only needed to get the keys of tests, not to search and export them """
+        self._filename = filename
+        self._data_hash = ResultCache.hash_file(data_file) if data_file else ""
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")  # readers don't wait for a test being written
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> contextlib.closing:
+        # one connection per call, so the history can be used from any thread
+        return contextlib.closing(sqlite3.connect(self._filename, timeout=10))
+
+    def get_key(self, test_case: st.TestCase, prelim: int = 0) -> str:
+        """ Same key as the result cache. Do this before running the test as compute might change the test case. """
+        if not self._data_hash:
+            raise ValueError("The history was opened without data file.")
+        return get_test_key(self._data_hash, test_case, prelim)
+
+    def get(self, key: str) -> Optional[st.TestResult]:
+        """ Return the latest result of an identical test or None if there is none """
+        with self._connect() as connection:
+            row = connection.execute("SELECT test_result FROM tests WHERE key = ? ORDER BY id DESC LIMIT 1", (key,)).fetchone()
+        if not row:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def add(self, key: str, test_case: st.TestCase, test_result: st.TestResult, name: str, shield_class: int, prismatics: bool,
+            prelim: int = 0):
+        """ Append a test. test_case has to be the test case before compute, as used for the key. """
+        row = {"time": time.time(),
+               "key": key,
+               "name": name,
+               "ship": test_case.ship.name,
+               "custom_name": test_case.ship.custom_name or "",
+               "shield_class": shield_class,
+               "boosters": test_case.number_of_boosters_to_test,
+               "explosive_dps": test_case.explosive_dps,
+               "kinetic_dps": test_case.kinetic_dps,
+               "thermal_dps": test_case.thermal_dps,
+               "absolute_dps": test_case.absolute_dps,
+               "damage_effectiveness": test_case.damage_effectiveness,
+               "scb_hitpoints": test_case.scb_hitpoints,
+               "guardian_hitpoints": test_case.guardian_hitpoints,
+               "prismatics": int(prismatics),
+               "prelim": prelim,
+               "survival_time": test_result.survival_time,
+               "result": test_result.get_output_string(),
+               "test_case": pickle.dumps(test_case, protocol=pickle.HIGHEST_PROTOCOL),
+               "test_result": pickle.dumps(test_result, protocol=pickle.HIGHEST_PROTOCOL)}
+        columns = ", ".join(row.keys())
+        values = ", ".join(":" + column for column in row.keys())
+        with self._connect() as connection:
+            with connection:
+                connection.execute(f"INSERT INTO tests ({columns}) VALUES ({values})", row)
+
+    def find(self, ship: str = None, shield_class: int = None, boosters: int = None, **profile) -> List[Dict[str, Any]]:
+        """
+        Return the tests matching all given settings, oldest first, without the pickled test case and result.
+        profile can hold any of PROFILE_COLUMNS.
+        """
+        conditions = {"ship": ship, "shield_class": shield_class, "boosters": boosters}
+        for column, value in profile.items():
+            if column not in PROFILE_COLUMNS:
+                raise ValueError(f"Unknown damage profile setting: {column}")
+            conditions[column] = value
+        conditions = {column: value for column, value in conditions.items() if value is not None}
+
+        query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM tests"
+        if conditions:
+            query += " WHERE " + " AND ".join(f"{column} = :{column}" for column in conditions.keys())
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute(query + " ORDER BY id", conditions)]
+
+    def export(self, output, csv_format: bool = False, **settings) -> int:
+        """ Write the tests matching the settings of find to an open file and return the number of tests written """
+        rows = self.find(**settings)
+        if csv_format:
+            writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                output.write(json.dumps(row) + "\n")
+        return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the history of test results.")
+    parser.add_argument("output", help="output file, CSV if it ends with .csv, JSON lines otherwise. Use - for stdout.")
+    parser.add_argument("--history", default=HISTORY_FILE, help="path to history.sqlite")
+    parser.add_argument("--ship", help="only tests of this ship")
+    parser.add_argument("--shield-class", type=int, help="only tests with this shield generator class")
+    parser.add_argument("--boosters", type=int, help="only tests with this number of boosters")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.history):
+        print(f"No history at {args.history}", file=sys.stderr)
+        sys.exit(1)
+    history = ResultHistory(args.history)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        count = history.export(output, csv_format=args.output.lower().endswith(".csv"),
+                               ship=args.ship, shield_class=args.shield_class, boosters=args.boosters)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Exported {count} tests", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+"""
+Streaming import of Loadout events from Elite Dangerous journal files.
+
+Journals are read line by line as bytes and only lines containing a Loadout event are parsed as JSON, so reading years
+of journals is limited by the disk rather than by the JSON parser. Files are scanned in parallel when there are many
+of them. Only the latest loadout of each ship (by ShipID) is kept. Lines that can't be parsed are skipped and counted,
+an incomplete last line of a journal the game is still writing is left out.
+
+JournalWatcher keeps checking a journal directory for new loadouts. It remembers how far it has read each journal in
+a small state file, so only new bytes are read, even after a restart.
+
+Usage: python journal.py <journal files or directories> [-o loadouts.txt]
+       python journal.py --watch <journal directory> --state journal_state.json [-o loadouts.txt]
+The output has one Loadout event per line, which is accepted by the import window and by the batch runner.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+LOADOUT_MARKERS = (b'"event":"Loadout"', b'"event": "Loadout"')
+JOURNAL_PATTERN = "Journal.*.log"
+PARALLEL_MIN_SIZE = 16 * 1024 * 1024  # bytes, scanning fewer bytes than this isn't worth starting processes
+
+
+class JournalLoadouts(object):
+    def __init__(self):
+        self.loadouts = dict()  # type: Dict[Any, Tuple[Tuple[str, int, int], Dict[str, Any]]]
+        self.files = 0
+        self.bad_lines = 0
+
+    def add(self, event: Dict[str, Any], order: Tuple[str, int, int]):
+        """ Keep the event if it is the latest one of its ship. order is the timestamp, file number and line number. """
+        key = event.get("ShipID", event.get("Ship"))
+        if key not in self.loadouts or self.loadouts[key][0] < order:
+            self.loadouts[key] = (order, event)
+
+    def get_loadouts(self) -> List[Dict[str, Any]]:
+        """ Return the latest loadout of each ship, oldest first """
+        return [event for order, event in sorted(self.loadouts.values(), key=lambda entry: entry[0])]
+
+
+def scan_file(filename: str, offset: int = 0) -> Tuple[List[Tuple[int, Dict[str, Any]]], int, int]:
+    """
+    Scan a file for Loadout events, starting at the given byte offset. An incomplete last line is left for the next
+    scan as the game might still be writing it.
+    :return: the events with their line numbers, the number of lines that couldn't be read and the offset after the
+    last complete line
+    """
+    events = list()
+    bad_lines = 0
+    with open(filename, "rb") as file:
+        file.seek(offset)
+        for line_number, line in enumerate(file):
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if LOADOUT_MARKERS[0] in line or LOADOUT_MARKERS[1] in line:
+                try:
+                    event = json.loads(line)
+                    if event.get("event") == "Loadout" and "Modules" in event:
+                        events.append((line_number, event))
+                        continue
+                except (ValueError, AttributeError):
+                    pass
+                bad_lines += 1
+    return events, bad_lines, offset
+
+
+def get_journal_files(paths: Iterable[str]) -> List[str]:
+    """ Expand directories to the journals in them. Journal names contain their date, so sorting them sorts by age. """
+    filenames = list()
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(glob.glob(os.path.join(path, JOURNAL_PATTERN))))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+def find_loadouts(paths: Iterable[str], processes: int = 0) -> JournalLoadouts:
+    """
+    Find the latest loadout of every ship in the given journal files and directories.
+    :param paths: journal files or directories containing journals
+    :param processes: number of processes to scan files with, 0 to decide based on the amount of data
+    """
+    filenames = get_journal_files(paths)
+    result = JournalLoadouts()
+    result.files = len(filenames)
+
+    if processes == 0:
+        total_size = sum(os.path.getsize(filename) for filename in filenames if os.path.isfile(filename))
+        processes = min(os.cpu_count() or 1, len(filenames)) if total_size >= PARALLEL_MIN_SIZE else 1
+
+    if processes > 1:
+        with multiprocessing.Pool(processes=processes) as pool:
+            scanned = pool.imap(scan_file, filenames, chunksize=4)
+            _add_scanned(result, scanned)
+    else:
+        _add_scanned(result, map(scan_file, filenames))
+    return result
+
+
+def _add_scanned(result: JournalLoadouts, scanned: Iterable[Tuple[List[Tuple[int, Dict[str, Any]]], int, int]]):
+    for file_number, (events, bad_lines, _) in enumerate(scanned):
+        result.bad_lines += bad_lines
+        for line_number, event in events:
+            result.add(event, (event.get("timestamp", ""), file_number, line_number))
+
+
+class JournalWatcher(object):
+    """
+    Reads new Loadout events from the journals of a directory. The state file holds the byte offset and modification
+    time up to which each journal has been read, and the latest loadout of each ship.
+    """
+    POLL_INTERVAL = 5  # seconds
+
+    def __init__(self, directory: str, state_file: str):
+        self.directory = directory
+        self._state_file = state_file
+        self._files = dict()  # type: Dict[str, Dict[str, float]]
+        self._loadouts = dict()  # type: Dict[str, Dict[str, Any]]
+        self.bad_lines = 0
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self._state_file, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("directory") == os.path.abspath(self.directory):
+                self._files = state.get("files", dict())
+                self._loadouts = state.get("loadouts", dict())
+        except (OSError, ValueError):
+            pass  # start from scratch
+
+    def _save_state(self):
+        state = {"directory": os.path.abspath(self.directory), "files": self._files, "loadouts": self._loadouts}
+        temp_filename = self._state_file + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temp_filename, self._state_file)
+
+    def get_loadouts(self) -> List[Dict[str, Any]]:
+        """ Return the latest loadout of each ship that has been read so far, oldest first """
+        return sorted(self._loadouts.values(), key=lambda event: event.get("timestamp", ""))
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """ Read the journals that changed since the last call and return the loadouts that are new, oldest first """
+        changed = JournalLoadouts()
+        read_files = False
+        for file_number, filename in enumerate(get_journal_files([self.directory])):
+            name = os.path.basename(filename)
+            try:
+                stat = os.stat(filename)
+                checkpoint = self._files.get(name, {"offset": 0, "mtime": 0})
+                if stat.st_size < checkpoint["offset"]:
+                    checkpoint = {"offset": 0, "mtime": 0}  # the file has been replaced
+                if stat.st_size == checkpoint["offset"] and stat.st_mtime == checkpoint["mtime"]:
+                    continue
+                events, bad_lines, offset = scan_file(filename, int(checkpoint["offset"]))
+            except OSError:
+                continue
+            read_files = True
+            self.bad_lines += bad_lines
+            self._files[name] = {"offset": offset, "mtime": stat.st_mtime}
+            for line_number, event in events:
+                changed.add(event, (event.get("timestamp", ""), file_number, line_number))
+
+        new_loadouts = list()
+        for event in changed.get_loadouts():
+            key = str(event.get("ShipID", event.get("Ship")))
+            if key not in self._loadouts or self._loadouts[key].get("timestamp", "") <= event.get("timestamp", ""):
+                self._loadouts[key] = event
+                new_loadouts.append(event)
+        if read_files:
+            self._save_state()
+        return new_loadouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the latest loadout of every ship in Elite Dangerous journals.")
+    parser.add_argument("paths", nargs="*", help="journal files or directories containing journals")
+    parser.add_argument("-o", "--output", default="-", help="output file with one Loadout event per line, - for stdout")
+    parser.add_argument("--processes", type=int, default=0, help="number of processes, 0 to decide automatically")
+    parser.add_argument("--watch", metavar="DIRECTORY", help="keep writing new loadouts from the journals of this directory")
+    parser.add_argument("--state", default="journal_state.json", help="state file of --watch")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.watch, args.state, args.output)
+        return
+    if not args.paths:
+        parser.error("no journal files or directories given")
+
+    result = find_loadouts(args.paths, args.processes)
+    loadouts = result.get_loadouts()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for event in loadouts:
+            output.write(json.dumps(event) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Found {len(loadouts)} ships in {result.files} files, skipped {result.bad_lines} bad lines", file=sys.stderr)
+
+
+def watch(directory: str, state_file: str, output_file: str):
+    watcher = JournalWatcher(directory, state_file)
+    output = sys.stdout if output_file == "-" else open(output_file, "a", encoding="utf-8")
+    try:
+        while True:
+            for event in watcher.poll():
+                output.write(json.dumps(event) + "\n")
+                output.flush()
+                print(f"New loadout of {event.get('ShipName') or event.get('Ship')} ({event.get('timestamp', '')})", file=sys.stderr)
+            time.sleep(JournalWatcher.POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    # On Windows calling this function is necessary.
+    multiprocessing.freeze_support()
+    main()
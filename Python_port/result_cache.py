@@ -0,0 +1,145 @@
+"""
+On-disk cache for test results of the shield tester.
+
+Results are stored as pickled TestResult objects, one file per test. The file name is a hash of the fields of the
+TestCase (ship with mass and base shield, shield generator variants, booster variants, booster count, damage profile,
+SCB and guardian hit points), the preliminary filtering setting and the content of data.json. The fields are written
+as JSON in a fixed order, so the key doesn't depend on the pickle protocol or on how the objects were built. Changing
+any input or the data file results in a different key, so stale entries are never returned and just age out of the cache.
+"""
+import dataclasses
+import enum
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Any, List, Optional, Tuple
+
+import shield_tester as st
+
+# fields of TestCase that decide the result, in the order they are hashed. Fields the engine adds later are hashed
+# after them, sorted by name, so a new setting can't be left out of the key.
+TEST_KEY_FIELDS = ["ship", "loadout_list", "shield_booster_variants", "number_of_boosters_to_test", "explosive_dps", "kinetic_dps",
+                   "thermal_dps", "absolute_dps", "damage_effectiveness", "scb_hitpoints", "guardian_hitpoints"]
+
+
+def _get_key_value(value: Any, path: Tuple[int, ...] = ()) -> Any:
+    """
+    Turn a value of a test case into plain lists, dicts and numbers that JSON writes the same way every time.
+    :raises TypeError: for a value that has no stable representation, rather than keying on its repr
+    """
+    if isinstance(value, enum.Enum):  # before the numbers, IntEnum members are ints too
+        return f"{type(value).__name__}.{value.name}"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if id(value) in path:
+        return "<cycle>"
+    path = path + (id(value),)
+    if hasattr(value, "tolist"):  # numpy arrays and scalars
+        return _get_key_value(value.tolist(), path)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+        return {"type": type(value).__name__, "fields": _get_key_value(fields, path)}
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):  # namedtuple
+        return {"type": type(value).__name__, "fields": _get_key_value(dict(value._asdict()), path)}
+    if isinstance(value, dict):
+        return {str(key): _get_key_value(item, path) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_get_key_value(item, path) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_get_key_value(item, path) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    if hasattr(value, "__dict__"):
+        return {"type": type(value).__name__, "fields": _get_key_value(vars(value), path)}
+    raise TypeError(f"can't build a result cache key from {type(value).__name__}")
+
+
+def get_test_key(data_hash: str, test_case: st.TestCase, prelim: int = 0) -> str:
+    """ Hash of everything that decides the result of a test. Do this before running the test as compute might change the test case. """
+    fields = [[name, _get_key_value(getattr(test_case, name, None))] for name in TEST_KEY_FIELDS]
+    fields += [[name, _get_key_value(value)] for name, value in sorted(vars(test_case).items()) if name not in TEST_KEY_FIELDS]
+    sha = hashlib.sha256()
+    sha.update(data_hash.encode())
+    sha.update(str(prelim).encode())
+    sha.update(json.dumps(fields, sort_keys=True, separators=(",", ":")).encode())
+    return sha.hexdigest()
+
+
+class ResultCache(object):
+    FILE_EXTENSION = ".pickle"
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024  # bytes
+    DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+
+    def __init__(self, directory: str, data_file: str, max_size: int = DEFAULT_MAX_SIZE, max_age: float = DEFAULT_MAX_AGE):
+        self._directory = directory
+        self._max_size = max_size
+        self._max_age = max_age
+        self._data_hash = ResultCache.hash_file(data_file)
+
+    @staticmethod
+    def hash_file(filename: str) -> str:
+        sha = hashlib.sha256()
+        with open(filename, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def get_key(self, test_case: st.TestCase, prelim: int = 0) -> str:
+        """ Get the key of a test case. Do this before running the test as compute might change the test case. """
+        return get_test_key(self._data_hash, test_case, prelim)
+
+    def _get_filename(self, key: str) -> str:
+        return os.path.join(self._directory, key + ResultCache.FILE_EXTENSION)
+
+    def get(self, key: str) -> Optional[st.TestResult]:
+        """ Return the cached result for the key or None if there is none """
+        filename = self._get_filename(key)
+        try:
+            if time.time() - os.path.getmtime(filename) > self._max_age:
+                os.remove(filename)
+                return None
+            with open(filename, "rb") as file:
+                test_result = pickle.load(file)
+            os.utime(filename)  # keep recently used entries when evicting
+            return test_result
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def put(self, key: str, test_result: st.TestResult):
+        os.makedirs(self._directory, exist_ok=True)
+        filename = self._get_filename(key)
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, "wb") as file:
+            pickle.dump(test_result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+        self.evict()
+
+    def _get_entries(self) -> List[Tuple[float, int, str]]:
+        entries = list()
+        if os.path.isdir(self._directory):
+            for entry in os.scandir(self._directory):
+                if entry.is_file() and entry.name.endswith(ResultCache.FILE_EXTENSION):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """ Remove entries that are too old and then the least recently used ones until the cache fits its size """
+        now = time.time()
+        entries = list()
+        for mtime, size, path in self._get_entries():
+            if now - mtime > self._max_age:
+                os.remove(path)
+            else:
+                entries.append((mtime, size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            os.remove(path)
+            total_size -= size
+
+    def clear(self):
+        for _, _, path in self._get_entries():
+            os.remove(path)